@@ -1,18 +1,20 @@
+import time
+STARTED_AT = time.perf_counter() # inicio do processo (antes de importar pygame), para o tempo ate o primeiro frame
+
 import pygame
-import random
-import threading
-import socket
+import math
 import queue
-import time
 import sys
 import os
 
-try:
-    import serial
-    SERIAL_AVAILABLE = True
-except Exception:
-    serial = None
-    SERIAL_AVAILABLE = False
+from snake_engine import SnakeEngine, GRID_W, GRID_H, FOOD_TYPES, CELL_EMPTY, CELL_BODY, CELL_OBSTACLE, CELL_FOOD
+from snake_render import LayerCache, TextCache, ChunkIndex, FontLoader
+from snake_storage import ScoreStore
+from snake_replay import ReplayRecorder
+from snake_io import InputReactor
+from snake_perf import LatencyTracker, FrameProfiler
+from snake_spectate import SpectatorServer, SPECTATOR_PORT
+from snake_telemetry import TelemetryLog
 
 # --- CONFIG 
 UDP_LISTEN_HOST = '0.0.0.0'
@@ -20,17 +22,26 @@ UDP_LISTEN_PORT = 5005
 SERIAL_ENABLED = True
 SERIAL_PORT = 'COM5'
 SERIAL_BAUD = 115200
-GRID_W = 56 # Era 64, agora 30
-GRID_H = 24 # Era 32, agora 20
+SPECTATOR_ENABLED = True # transmite a partida (UDP) para snake_viewer.py
+TELEMETRY_ENABLED = True # eventos de jogo em telemetry/*.jsonl (resumo: python snake_telemetry.py)
+DIRTY_RECTS = True # atualiza so os tiles/HUD que mudaram (display.update(rects))
+RENDER_FPS = 60 # limite de frames desenhados; 0 = sem limite (a simulacao nao depende disso)
+MAX_FRAME_DT = 0.25 # frames mais longos que isso (janela arrastada, etc.) nao viram rajada de ticks
+UNCAPPED_TICKS_PER_FRAME = 1000 # modo --uncapped: ticks por frame, sem relogio
+IDLE_WAIT = True # sem animacao o loop dorme em event.wait: jogando, ate o proximo tick; menu/pausa/gameover, ate um evento
+IDLE_WAKE_INTERVAL = 0.5 # telas paradas acordam pelo menos assim (espectadores, inscricoes)
 TILE = 16
 
 HUD_TILES = 3
 
 SCREEN_W = 64 * TILE
 SCREEN_H = HUD_TILES * TILE + 32 * TILE
-SPEED = 8.0
-MIN_SPEED = 4.0
-MAX_SPEED = 25.0
+
+# tabuleiro maior que isso (em tiles) entra no modo camera: so a janela em volta da cabeca e desenhada
+VIEW_COLS = SCREEN_W // TILE
+VIEW_ROWS = (SCREEN_H - HUD_TILES * TILE) // TILE
+CAMERA_MARGIN = 8 # a camera anda quando a cabeca chega a essa distancia da borda da janela
+CHUNK_TILES = 16 # lado dos blocos do indice espacial do modo camera
 
 DISPLAY_GREEN = (110, 236, 0)
 BLACK = (0, 0, 0)
@@ -42,247 +53,128 @@ FOOD_COLORS = {
     'purple': (150, 40, 180),  # roxa
     'orange': (230, 120, 20)   # laranja
 }
-FOOD_TYPES = list(FOOD_COLORS.keys())
 
-HUNGER_LIMIT = 20.0
-
-BEST_SCORE_FILE = 'best_score.txt'
 PIXEL_FONT_FILENAME = 'Iceberg-Regular.ttf'
-
-MIN_SEGMENTS = 3
-
-OBSTACLES_AFTER_EATEN = 10
-
-ORANGE_ALLOWED_WAVE = 3
-
+FALLBACK_FONT = 'dejavusansmono'
+FONT_CACHE_FILE = 'font_path.txt' # fonte do sistema ja resolvida (evita varrer as fontes a cada boot)
+FONT_SIZE = max(16, int(TILE * 2.0))
+LARGE_FONT_SIZE = max(24, int(TILE * 4.0))
+DEBUG_FONT_SIZE = 12
+GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTUP_LOG_FILE = 'startup_times.csv' # uma linha por boot: timestamp,imports,init,fontes,primeiro frame (ms)
+REPLAY_DIR = 'replays' # um .snkr por partida (seed + comandos), para reproduzir bugs
+MAX_REPLAYS = 200 # replays guardados (os mais velhos sao apagados); 0 = nao grava replays
+LATENCY_CSV_FILE = 'latency.csv' # exportado com F4; F3 mostra/esconde o overlay de latencia
+FRAME_PROFILER = True # grava o tempo de cada fase do frame (custo ~1us/frame); F2 = overlay, shift+F2 = dump
+FRAME_TRACE_FILE = 'frame_trace.csv'
+PERF_GRAPH_FRAMES = 120 # frames no grafico do overlay
+PERF_GRAPH_H = 48
+PERF_TEXT_REFRESH = 0.25
+
+# fblits (pygame-ce) e mais rapido que blits para listas de (sprite, posicao)
+FBLITS_AVAILABLE = hasattr(pygame.Surface, 'fblits')
+
+# lotes [(source, cmd, t_recv), ...]: um put por acordada do InputReactor / por frame do teclado
 input_queue = queue.Queue()
-
-def udp_listener(stop_event, q, host=UDP_LISTEN_HOST, port=UDP_LISTEN_PORT):
-    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    s.bind((host, port))
-    s.settimeout(1.0)
-    while not stop_event.is_set():
-        try:
-            data, addr = s.recvfrom(64)
-            cmd = data.decode('utf-8', errors='ignore').strip().upper()
-            if cmd:
-                q.put(('remote', cmd))
-        except socket.timeout:
-            continue
-        except Exception:
-            continue
-    s.close()
-
-def serial_listener(stop_event, q, port=SERIAL_PORT, baud=SERIAL_BAUD):
-    if not SERIAL_AVAILABLE:
-        print('pyserial não disponível; serial desativado')
-        return
-    try:
-        ser = serial.Serial(port, baud, timeout=1)
-    except Exception as e:
-        print('Falha ao abrir serial:', e)
-        return
-    while not stop_event.is_set():
-        try:
-            line = ser.readline().decode('utf-8', errors='ignore').strip()
-            if line:
-                q.put(('remote', line.upper()))
-        except Exception:
-            continue
-    ser.close()
-
-# --- utilities
-def load_best_score():
-    try:
-        if os.path.exists(BEST_SCORE_FILE):
-            with open(BEST_SCORE_FILE, 'r') as f:
-                return int(f.read().strip())
-    except Exception:
-        pass
-    return 0
-
-def save_best_score(val):
-    try:
-        with open(BEST_SCORE_FILE, 'w') as f:
-            f.write(str(int(val)))
-    except Exception:
-        pass
+# postado pelo InputReactor a cada lote remoto: acorda o event.wait do loop ocioso
+INPUT_READY_EVENT = pygame.event.custom_type()
 
 # --- o jogo
-class SnakeGame:
-    def __init__(self):
-        pygame.init()
+class SnakeGame(SnakeEngine):
+    def __init__(self, grid_w=GRID_W, grid_h=GRID_H):
+        self._init_at = time.perf_counter()
+        # so video e fonte: o jogo nao tem som e abrir o audio atrasa o boot
+        pygame.display.init()
         pygame.font.init()
 
         self.screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
         pygame.display.set_caption('Snake - Waves & Obstacles (Nokia Inspired)')
         self.clock = pygame.time.Clock()
-        small_size = max(16, int(TILE * 2.0))
-        big_size   = max(24, int(TILE * 4.0))
 
-        if os.path.exists(PIXEL_FONT_FILENAME):
-            try:
-                self.pixel_font = pygame.font.Font(PIXEL_FONT_FILENAME, small_size)
-                self.pixel_font_big = pygame.font.Font(PIXEL_FONT_FILENAME, big_size)
-            except Exception:
-                self.pixel_font = pygame.font.SysFont('dejavusansmono', small_size)
-                self.pixel_font_big = pygame.font.SysFont('dejavusansmono', big_size)
-        else:
-            self.pixel_font = pygame.font.SysFont('dejavusansmono', small_size)
-            self.pixel_font_big = pygame.font.SysFont('dejavusansmono', big_size)
-
-        self.font = self.pixel_font
-        self.large_font = self.pixel_font_big
-
-        self.best_score = load_best_score()
-        self.start_new_game(initial_menu=True)
-
-    def spawn_wave(self, n_foods):
-        """
-        Cria uma nova leva:
-         - limpa comidas (e obstáculos)
-         - gera n_foods (1..3)
-         - gera 1..2 pedras se self.eaten_count >= OBSTACLES_AFTER_EATEN
-        Observação: chama-se spawn_wave tanto no início (onde wave_number já = 1)
-        quanto após cada reset — quando for um reset incrementamos wave_number antes de chamar.
-        """
-        n_foods = max(1, min(3, int(n_foods)))
-        self.foods = []
-        self.obstacles = []
-        added = 0
-        tries = 0
-        while added < n_foods and tries < 1000:
-            tries += 1
-            f = self._create_food_candidate()
-            if f:
-                self.foods.append(f)
-                added += 1
-
-        if getattr(self, 'eaten_count', 0) >= OBSTACLES_AFTER_EATEN:
-            n_obst = random.randint(1, 2)
-            added_o = 0
-            tries = 0
-            while added_o < n_obst and tries < 1000:
-                tries += 1
-                obs = self._create_obstacle_candidate()
-                if obs:
-                    self.obstacles.append(obs)
-                    added_o += 1
-
-        if len(self.foods) == 0:
-            f = self._create_food_candidate(force=True)
-            if f:
-                self.foods.append(f)
-
-    def _create_food_candidate(self, force=False):
-        """Tenta retornar a dict {'pos':(x,y), 'type':str} sem colidir com snake/obstacles/foods.
-        Respeita a regra que a comida laranja só pode aparecer se wave_number >= ORANGE_ALLOWED_WAVE.
-        """
-        tries = 0
-        while tries < 500:
-            tries += 1
-            x = random.randint(0, GRID_W-1)
-            y = random.randint(0, GRID_H-1)
-            pos = (x, y)
-            if pos in self.snake:
-                continue
-            if any(pos in obs for obs in getattr(self, 'obstacles', [])):
-                continue
-            if any(f['pos'] == pos for f in getattr(self, 'foods', [])):
-                continue
-
-            allowed_types = FOOD_TYPES.copy()
-            if getattr(self, 'wave_number', 1) < ORANGE_ALLOWED_WAVE:
-
-                if 'orange' in allowed_types:
-                    allowed_types.remove('orange')
-            if not allowed_types:
-                allowed_types = FOOD_TYPES.copy()
-
-            ftype = random.choice(allowed_types)
-            return {'pos': pos, 'type': ftype}
-
-        if force:
-            for x in range(GRID_W):
-                for y in range(GRID_H):
-                    pos = (x,y)
-                    if pos not in self.snake:
-                        allowed_types = FOOD_TYPES.copy()
-                        if getattr(self, 'wave_number', 1) < ORANGE_ALLOWED_WAVE and 'orange' in allowed_types:
-                            allowed_types.remove('orange')
-                        ftype = random.choice(allowed_types) if allowed_types else random.choice(FOOD_TYPES)
-                        return {'pos': pos, 'type': ftype}
-        return None
-
-    def _create_obstacle_candidate(self):
-        """
-        Cria um triângulo 3x2 (top center + bottom row of 3).
-        Retorna set of tiles {(x+1,y),(x,y+1),(x+1,y+1),(x+2,y+1)} ou None.
-        """
-        tries = 0
-        while tries < 500:
-            tries += 1
-            x = random.randint(0, max(0, GRID_W - 3))
-            y = random.randint(0, max(0, GRID_H - 2))
-            tiles = {(x+1, y), (x, y+1), (x+1, y+1), (x+2, y+1)}
-
-
-            if any(t in self.snake for t in tiles):
-                continue
-
-            if any(any(f['pos'] == t for f in self.foods) for t in tiles):
-                continue
-
-            overlap = False
-            for other in getattr(self, 'obstacles', []):
-                for t in tiles:
-                    if t in other:
-                        overlap = True
-                        break
-                if overlap:
-                    break
-            if overlap:
-                continue
-            return tiles
-        return None
-
-    # --- ciclo de vida basico do jogo
-    def start_new_game(self, initial_menu=False):
-        cx, cy = GRID_W//2, GRID_H//2
-        self.snake = [(cx, cy), (cx-1, cy), (cx-2, cy)]
-        self.direction = (1, 0)
-        self.next_direction = self.direction
-
-        self.foods = []
-        self.obstacles = []
-        self.eaten_count = 0
-
-        self.wave_number = 1
-
-
-        self.spawn_wave(random.randint(1, 3))
-
-        self.score = 0
-        self.speed = float(SPEED)
-        self.move_timer = 0.0
-        self.move_delay = 1.0 / self.speed
-        self.pending_grow = 0
-        self.hunger_timer = 0.0
-        self.hunger_limit = HUNGER_LIMIT
-        self.gameover_selection = 0
-
-        self.state = 'menu' if initial_menu else 'playing'
-    
+        # fontes abertas no primeiro texto desenhado; o TTF e procurado tambem ao lado do script
+        self.fonts = FontLoader((PIXEL_FONT_FILENAME, os.path.join(GAME_DIR, PIXEL_FONT_FILENAME)),
+                                FALLBACK_FONT, FONT_CACHE_FILE)
+        self.startup = None   # tempos do boot (ms), preenchido no primeiro frame
+
+        self.scores = ScoreStore()
+        self.best_score = self.scores.best_score
+        self.recorder = ReplayRecorder(on_replay=self._save_replay) if MAX_REPLAYS else None
+
+        # latencia dos comandos: recebido -> fila -> step -> frame
+        self.latency = LatencyTracker()
+        self._turns_pending = []
+        self._turns_applied = []
+        self.show_latency = False
+
+        # perfil por fase do frame (buffer circular) e overlay com graficos
+        self.profiler = FrameProfiler(enabled=FRAME_PROFILER)
+        self.show_perf = False
+        self._perf_lines = None
+        self._perf_lines_at = 0.0
+
+        # renderizacao incremental
+        self.dirty_cells = set()
+        self._full_redraw = True
+        self._last_frame_key = None
+        self._last_hud = None
+        self.layers = LayerCache()
+        self.text_cache = TextCache()
+
+        # eventos do engine, consumidos uma vez por frame pelos espectadores e pela telemetria
+        self.spectators = None
+        self.telemetry = None
+        if SPECTATOR_ENABLED or TELEMETRY_ENABLED:
+            self.events = []
+
+        # tabuleiro grande: camera seguindo a cabeca + indice espacial por blocos
+        self.large_board = grid_w > VIEW_COLS or grid_h > VIEW_ROWS
+        self.camera = None
+        if self.large_board:
+            self.chunks = ChunkIndex(grid_w, grid_h, CHUNK_TILES)
+
+        SnakeEngine.__init__(self, grid_w, grid_h, initial_menu=True)
+        self._ready_at = time.perf_counter()
+
+    @property
+    def font(self):
+        return self.fonts.get(FONT_SIZE)
+
+    @property
+    def large_font(self):
+        return self.fonts.get(LARGE_FONT_SIZE)
+
+    def start_new_game(self, initial_menu=False, seed=None):
+        # giros da partida anterior nao entram na latencia da nova
+        self._turns_pending = []
+        SnakeEngine.start_new_game(self, initial_menu, seed)
+
+    def on_game_over(self):
+        self._turns_pending = []
+        if self.score > self.best_score:
+            self.best_score = self.score
+            self.scores.submit_best(self.best_score)
+        self.scores.record_game(self.score, self.wave_number, len(self.snake), self.death_cause)
+        self.scores.request_flush()
+
+    def _save_replay(self, data):
+        name = '%s_%d.snkr' % (time.strftime('%Y%m%d_%H%M%S'), self.game_seed)
+        self.scores.write_file(os.path.join(REPLAY_DIR, name), data, keep=MAX_REPLAYS)
+
+    def on_layout_changed(self):
+        self.layers.invalidate('obstacles')
+        self.invalidate_screen()
+
+    def invalidate_screen(self):
+        self._full_redraw = True
 
     def get_game_area_offset(self):
 
-        game_area_total_width = GRID_W * TILE
+        game_area_total_width = self.grid_w * TILE
         offset_x = (SCREEN_W - game_area_total_width) // 2
 
         total_space_below_hud = SCREEN_H - (HUD_TILES * TILE)
         
-        game_area_total_height = GRID_H * TILE
+        game_area_total_height = self.grid_h * TILE
 
         top_padding = (total_space_below_hud - game_area_total_height) // 2
         
@@ -292,109 +184,360 @@ class SnakeGame:
         return offset_x, offset_y
 
     def grid_to_pixel(self, gx, gy):
-        offset_x, offset_y = self.get_game_area_offset()
+        offset_x, offset_y = self._area_offset()
         px = offset_x + gx * TILE
         py = offset_y + gy * TILE
         return px, py
 
-    # --- drawing
-    def draw(self):
-        # fundo verde
-        self.screen.fill(DISPLAY_GREEN)
-        score_text = f'{self.score:04d}'
-        score_surf = self.font.render(score_text, False, BLACK)
-        
-        pos_y = (HUD_TILES * TILE - score_surf.get_height()) // 2
-        
-        # score (esquerda)
-        self.screen.blit(score_surf, (10, pos_y))
+    def _layout_key(self):
+        return (self.screen.get_size(), self.grid_w, self.grid_h, TILE)
 
-        # best (centro)
-        best_text = f'BEST {self.best_score:04d}'
-        best_surf = self.font.render(best_text, False, BLACK)
-        best_x = (SCREEN_W - best_surf.get_width()) // 2 # Centralizado
-        self.screen.blit(best_surf, (best_x, pos_y))
+    def _area_offset(self):
+        return self.layers.get('area_offset', self._layout_key(), self.get_game_area_offset)
 
-        # timer (direita)
-        time_left = max(0.0, self.hunger_limit - self.hunger_timer)
-        timer_text = f'{time_left:0.0f}s'
-        timer_surf = self.font.render(timer_text, False, BLACK)
-        timer_x = SCREEN_W - timer_surf.get_width() - 10 # 10 pixels da direita
-        self.screen.blit(timer_surf, (timer_x, pos_y))
-        
-        # --- DEMARCACAO DO HUD ---
-        pygame.draw.line(self.screen, BLACK, (0, HUD_TILES*TILE - 1), (SCREEN_W, HUD_TILES*TILE - 1), 2)
-        
-        offset_x, offset_y = self.get_game_area_offset()
-        
-        # Area jogável
-        game_area_px_x = offset_x
-        game_area_px_y = offset_y
-        game_area_px_w = GRID_W * TILE
-        game_area_px_h = GRID_H * TILE
+    def _cell_positions(self):
+        # canto de cada celula na tela, por indice da grade (uma vez por layout; so no modo tabuleiro inteiro)
+        return self.layers.get('cell_pos', self._layout_key(), self._build_cell_positions)
 
-        game_rect_bg = pygame.Rect(game_area_px_x, game_area_px_y, game_area_px_w, game_area_px_h)
-        pygame.draw.rect(self.screen, DISPLAY_GREEN, game_rect_bg)
-        
-        # Borda
-        dot_size = max(1, TILE // 8) 
-        dot_step = max(1, TILE // 4) 
-        
+    def _build_cell_positions(self):
+        offset_x, offset_y = self._area_offset()
+        return [(offset_x + x * TILE, offset_y + y * TILE) for y in range(self.grid_h) for x in range(self.grid_w)]
 
-        for x in range(0, game_area_px_w, dot_step):
-            pygame.draw.rect(self.screen, BLACK, (game_area_px_x + x, game_area_px_y, dot_size, dot_size)) # Top
-            pygame.draw.rect(self.screen, BLACK, (game_area_px_x + x, game_area_px_y + game_area_px_h - dot_size, dot_size, dot_size)) # Bottom
-        
+    def _blits(self, seq):
+        """Desenha uma lista de (sprite, posicao) numa chamada so."""
+        if FBLITS_AVAILABLE:
+            self.screen.fblits(seq)
+        else:
+            self.screen.blits(seq, doreturn=False)
+
+    def _view_rect(self):
+        """Retangulo (pixels) da area de jogo visivel: o tabuleiro inteiro ou a janela da camera."""
+        if not self.large_board:
+            offset_x, offset_y = self.get_game_area_offset()
+            return pygame.Rect(offset_x, offset_y, self.grid_w * TILE, self.grid_h * TILE)
+        cols = min(self.grid_w, VIEW_COLS)
+        rows = min(self.grid_h, VIEW_ROWS)
+        top = HUD_TILES * TILE
+        return pygame.Rect((SCREEN_W - cols * TILE) // 2, top + (SCREEN_H - top - rows * TILE) // 2,
+                           cols * TILE, rows * TILE)
+
+    # --- camera (modo tabuleiro grande)
+    def _follow_head(self):
+        """Move a camera se a cabeca saiu da zona central; retorna True se mudou."""
+        cols = min(self.grid_w, VIEW_COLS)
+        rows = min(self.grid_h, VIEW_ROWS)
+        hx, hy = self.snake[0]
+        if self.camera is None:
+            camera = ((hx - cols // 2) % self.grid_w, (hy - rows // 2) % self.grid_h)
+        else:
+            camera = (self._scroll_axis(self.camera[0], hx, cols, self.grid_w),
+                      self._scroll_axis(self.camera[1], hy, rows, self.grid_h))
+        if camera == self.camera:
+            return False
+        self.camera = camera
+        return True
+
+    @staticmethod
+    def _scroll_axis(start, head, size, world):
+        if size >= world:
+            return 0
+        margin = min(CAMERA_MARGIN, (size - 1) // 2)
+        rel = (head - start) % world
+        if rel < margin:
+            start = head - margin
+        elif rel > size - 1 - margin:
+            start = head - (size - 1 - margin)
+        return start % world
+
+    def _cell_to_view(self, idx, view):
+        """Posicao na tela da celula idx, ou None se fora da janela (a janela da a volta no mundo)."""
+        y, x = divmod(idx, self.grid_w)
+        vx = (x - self.camera[0]) % self.grid_w
+        vy = (y - self.camera[1]) % self.grid_h
+        if vx * TILE >= view.width or vy * TILE >= view.height:
+            return None
+        return (view.x + vx * TILE, view.y + vy * TILE)
 
-        for y in range(0, game_area_px_h, dot_step):
-            pygame.draw.rect(self.screen, BLACK, (game_area_px_x, game_area_px_y + y, dot_size, dot_size)) # Left
-            pygame.draw.rect(self.screen, BLACK, (game_area_px_x + game_area_px_w - dot_size, game_area_px_y + y, dot_size, dot_size)) # Right
-        
-        # --- FIM DO HUD e BORDAS ---
+    # --- drawing
+    def draw(self):
+        if self.large_board:
+            self._draw_viewport()
+            return
+        if not DIRTY_RECTS:
+            self._draw_scene()
+            self._draw_debug_overlays()
+            self._present()
+            return
 
+        frame_key = (self.state, self.gameover_selection)
+        if self._full_redraw or frame_key != self._last_frame_key:
+            # menu, pause, gameover, nova leva: repinta tudo
+            self._draw_scene()
+            self._draw_debug_overlays()
+            self._present()
+            self._full_redraw = False
+            self._last_frame_key = frame_key
+            self._last_hud = self._hud_texts()
+            self.dirty_cells.clear()
+            return
 
-        # comidas
-        food_size = int(TILE * 0.6)
-        for f in self.foods:
-            fx, fy = f['pos']
-            fpx, fpy = self.grid_to_pixel(fx, fy)
-            frect = pygame.Rect(fpx + (TILE - food_size)//2, fpy + (TILE - food_size)//2, food_size, food_size)
-            color = FOOD_COLORS.get(f['type'], (200,20,20))
-            pygame.draw.rect(self.screen, color, frect, border_radius=2)
+        if self.state != 'playing':
+            # telas paradas: nada mudou
+            return
+
+        rects = []
+        hud = self._hud_texts()
+        if hud != self._last_hud:
+            rects.append(self._draw_hud())
+            self._last_hud = hud
+        if self.dirty_cells:
+            rects += self._draw_cells(self.dirty_cells)
+            self.dirty_cells.clear()
+        rects += self._draw_debug_overlays()
+        if rects:
+            self._present(rects)
+
+    def _present(self, rects=None):
+        self.profiler.mark('draw')
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+        self.profiler.mark('present')
+
+    # --- instrumentacao
+    def handle_command(self, source, cmd, t_recv):
+        """process_input_cmd com medicao de latencia (t_recv = perf_counter do recebimento)."""
+        self.latency.record(source, 'drain', time.perf_counter() - t_recv)
+        action = FRONTEND_ACTIONS.get(cmd)
+        if action is not None:
+            action(self)
+            return
+        before = self.pending_turns()
+        self.process_input_cmd(source, cmd)
+        if self.pending_turns() > before:
+            # giro aceito na fila; no menu ou na pausa a espera nao e latencia (None so mantem a ordem)
+            self._turns_pending.append((source, t_recv if self.state == 'playing' else None))
+
+    def _note_ticks(self, n_ticks):
+        # cada step aplica o giro mais antigo da fila: os que sairam dela foram aplicados agora
+        if n_ticks and self._turns_pending:
+            applied = len(self._turns_pending) - self.pending_turns()
+            if applied > 0:
+                now = time.perf_counter()
+                measured = [turn for turn in self._turns_pending[:applied] if turn[1] is not None]
+                for source, t_recv in measured:
+                    self.latency.record(source, 'apply', now - t_recv)
+                self._turns_applied += measured
+                del self._turns_pending[:applied]
+
+    def _note_presented(self):
+        if self._turns_applied:
+            now = time.perf_counter()
+            for source, t_recv in self._turns_applied:
+                self.latency.record(source, 'present', now - t_recv)
+            self._turns_applied = []
+
+    def _note_startup(self):
+        now = time.perf_counter()
+        self.startup = {'imports': (self._init_at - STARTED_AT) * 1000,
+                        'init': (self._ready_at - self._init_at) * 1000,
+                        'fonts': self.fonts.resolve_seconds * 1000,
+                        'first_frame': (now - STARTED_AT) * 1000}
+        print('Primeiro frame em %(first_frame).0f ms (imports %(imports).0f, init %(init).0f, fontes %(fonts).0f)'
+              % self.startup)
+        try:
+            with open(STARTUP_LOG_FILE, 'a') as f:
+                f.write('%s,%.1f,%.1f,%.1f,%.1f\n' % (time.strftime('%Y-%m-%dT%H:%M:%S'), self.startup['imports'],
+                                                     self.startup['init'], self.startup['fonts'],
+                                                     self.startup['first_frame']))
+        except OSError:
+            pass
+
+    def _draw_debug_overlays(self):
+        """Desenha os paineis de depuracao ligados e devolve os rects alterados."""
+        rects = []
+        if self.show_latency:
+            rects.append(self._draw_panel(['LATENCIA (F3, F4 = csv)'] + self.latency.summary_lines()
+                                          + self._io_lines(), 'topleft'))
+        if self.show_perf:
+            rects += self._draw_perf_overlay()
+        return rects
+
+    def _io_lines(self):
+        io = getattr(self, 'io', None)
+        if io is None:
+            return []
+        parser = io.serial_parser
+        return ['udp malformados %d  serial quadros %d malformados %d reconexoes %d'
+                % (io.udp_malformed, parser.frames, parser.malformed, io.serial_reconnects)]
+
+    def _draw_perf_overlay(self):
+        # percentis recalculados 4x por segundo; o grafico, todo frame
+        now = time.perf_counter()
+        if self._perf_lines is None or now - self._perf_lines_at > PERF_TEXT_REFRESH:
+            self._perf_lines = ['FRAME (F2, shift+F2 = csv)'] + self.profiler.summary_lines()
+            if self.startup is not None:
+                self._perf_lines.append('boot: primeiro frame %(first_frame).0fms (imports %(imports).0f, init %(init).0f)' % self.startup)
+            self._perf_lines_at = now
+        panel = self._draw_panel(self._perf_lines, 'topright')
+
+        graph = pygame.Rect(0, 0, PERF_GRAPH_FRAMES * 2, PERF_GRAPH_H)
+        graph.topright = (panel.right, panel.bottom + 2)
+        self.screen.fill(BLACK, graph)
+        budget = 1.0 / RENDER_FPS if RENDER_FPS else 1.0 / 60
+        scale = PERF_GRAPH_H / (2.0 * budget)   # topo do grafico = 2 frames de orcamento
+        x = graph.right - 2
+        for total in reversed(self.profiler.recent_totals(PERF_GRAPH_FRAMES)):
+            h = min(PERF_GRAPH_H, max(1, int(total * scale)))
+            color = FOOD_COLORS['red'] if total > budget else WHITE
+            self.screen.fill(color, (x, graph.bottom - h, 2, h))
+            x -= 2
+        y = graph.bottom - int(budget * scale)
+        pygame.draw.line(self.screen, DISPLAY_GREEN, (graph.left, y), (graph.right - 1, y))
+        return [panel, graph]
+
+    def _draw_panel(self, lines, corner):
+        font = self.fonts.get(DEBUG_FONT_SIZE)
+        surfs = [font.render(line, False, WHITE) for line in lines]
+        w = max(s.get_width() for s in surfs) + 8
+        h = sum(s.get_height() for s in surfs) + 8
+        view = self._view_rect()
+        rect = pygame.Rect(0, 0, w, h)
+        if corner == 'topleft':
+            rect.topleft = (view.left + 4, view.top + 4)
+        else:
+            rect.topright = (view.right - 4, view.top + 4)
+        self.screen.fill(BLACK, rect)
+        y = rect.top + 4
+        for surf in surfs:
+            self.screen.blit(surf, (rect.left + 4, y))
+            y += surf.get_height()
+        return rect
+
+    def toggle_latency_overlay(self):
+        self.show_latency = not self.show_latency
+        self.invalidate_screen()
+
+    def export_latency_csv(self, path=LATENCY_CSV_FILE):
+        self.scores.write_file(path, self.latency.to_csv())
+
+    def toggle_perf_overlay(self):
+        self.show_perf = not self.show_perf
+        # o overlay precisa de dados mesmo com FRAME_PROFILER desligado
+        self.profiler.set_enabled(FRAME_PROFILER or self.show_perf)
+        self._perf_lines = None
+        self.invalidate_screen()
+
+    def dump_frame_trace(self, path=FRAME_TRACE_FILE):
+        self.scores.write_file(path, self.profiler.to_csv())
+
+    def _hud_texts(self):
+        time_left = max(0.0, self.hunger_limit - self.hunger_timer)
+        return (f'{self.score:04d}', f'BEST {self.best_score:04d}', f'{time_left:0.0f}s')
+
+    def _draw_hud(self):
+        hud_rect = pygame.Rect(0, 0, SCREEN_W, HUD_TILES*TILE - 2)
+        self.screen.blit(self._playfield_layer(), hud_rect, hud_rect)
+        score_text, best_text, timer_text = self._hud_texts()
+        score_surf = self.text_cache.render(self.font, score_text, BLACK)
+        pos_y = (HUD_TILES * TILE - score_surf.get_height()) // 2
+        self.screen.blit(score_surf, (10, pos_y))
+        best_surf = self.text_cache.render(self.font, best_text, BLACK)
+        self.screen.blit(best_surf, ((SCREEN_W - best_surf.get_width()) // 2, pos_y))
+        timer_surf = self.text_cache.render(self.font, timer_text, BLACK)
+        self.screen.blit(timer_surf, (SCREEN_W - timer_surf.get_width() - 10, pos_y))
+        return hud_rect
+
+    def _draw_cells(self, cells):
+        """Repinta tiles do tabuleiro (fundo, borda pontilhada e conteudo) e devolve seus rects."""
+        positions = self._cell_positions()
+        sprites = self._content_sprites()
+        grid = self.grid
+        playfield = self._playfield_layer()
+        rects = [pygame.Rect(positions[idx], (TILE, TILE)) for idx in cells]
+        self.screen.blits([(playfield, r, r) for r in rects], doreturn=False)
+        self._blits([(sprites[grid[idx]], positions[idx]) for idx in cells if grid[idx] != CELL_EMPTY])
+        return rects
+
+    def _draw_scene(self):
+        # fundo verde, demarcacao do HUD e borda pontilhada (camada estatica)
+        self.screen.blit(self._playfield_layer(), (0, 0))
+        self._draw_hud()
+
+        positions = self._cell_positions()
+        sprites = self._content_sprites()
+        w = self.grid_w
+
+        # comidas (o codigo da celula ja diz o tipo)
+        grid = self.grid
+        self._blits([(sprites[grid[y * w + x]], positions[y * w + x]) for x, y in (f['pos'] for f in self.foods)])
 
         # obstaculos
-        for obs in self.obstacles:
-            for (ox, oy) in obs:
-                opx, opy = self.grid_to_pixel(ox, oy)
-                rect = pygame.Rect(opx + (TILE//8), opy + (TILE//8), TILE - TILE//4, TILE - TILE//4)
-                pygame.draw.rect(self.screen, BLACK, rect, border_radius=max(1, TILE//6))
+        self.screen.blit(self._obstacle_layer(), (0, 0))
+
+        # cobra: um sprite so, uma chamada para todos os segmentos
+        body = sprites[CELL_BODY]
+        self._blits([(body, positions[y * w + x]) for x, y in self.snake])
+
+        self._draw_state_overlay()
+
+    def _draw_viewport(self):
+        """Modo camera: desenha so as celulas ocupadas dos blocos que cruzam a janela."""
+        moved = self._follow_head()
+        view = self._view_rect()
+        sprites = self._tile_sprites()
+        grid = self.grid
+        frame_key = (self.state, self.gameover_selection)
+        if not DIRTY_RECTS or self._full_redraw or moved or frame_key != self._last_frame_key:
+            self.screen.blit(self._playfield_layer(), (0, 0))
+            self._draw_hud()
+            seq = []
+            for idx in self.chunks.query(self.camera[0], self.camera[1], view.width // TILE, view.height // TILE):
+                pos = self._cell_to_view(idx, view)
+                if pos is not None:
+                    seq.append((sprites[grid[idx]], pos))
+            self._blits(seq)
+            self._draw_state_overlay()
+            self._draw_debug_overlays()
+            self._present()
+            self._full_redraw = False
+            self._last_frame_key = frame_key
+            self._last_hud = self._hud_texts()
+            self.dirty_cells.clear()
+            return
 
-        # cobra
-        seg_w = int(TILE * 0.7)
-        seg_h = int(TILE * 0.7)
-        for i, (sx, sy) in enumerate(self.snake):
-            px, py = self.grid_to_pixel(sx, sy)
-            seg_rect = pygame.Rect(px + (TILE - seg_w)//2, py + (TILE - seg_h)//2, seg_w, seg_h)
-            pygame.draw.rect(self.screen, BLACK, seg_rect, border_radius=max(1, seg_w//6))
+        if self.state != 'playing':
+            return
 
+        rects = []
+        hud = self._hud_texts()
+        if hud != self._last_hud:
+            rects.append(self._draw_hud())
+            self._last_hud = hud
+        seq = []
+        for idx in self.dirty_cells:
+            pos = self._cell_to_view(idx, view)
+            if pos is not None:
+                seq.append((sprites[grid[idx]], pos))
+                rects.append(pygame.Rect(pos, (TILE, TILE)))
+        self._blits(seq)
+        self.dirty_cells.clear()
+        rects += self._draw_debug_overlays()
+        if rects:
+            self._present(rects)
+
+    def _draw_state_overlay(self):
         # overlays: menu / pause / gameover
         if self.state == 'menu':
             self._draw_center_text('SNAKE - Pressione ENTER para jogar', self.font, (SCREEN_W//2, SCREEN_H//2 - 30))
             self._draw_center_text('WASD ou setas para mover. ESP32 via porta COM5 %d' % UDP_LISTEN_PORT, self.font, (SCREEN_W//2, SCREEN_H//2 + 20))
         elif self.state == 'paused':
-            overlay = pygame.Surface((SCREEN_W, SCREEN_H), pygame.SRCALPHA)
-            overlay.fill((0,0,0,160))
-            self.screen.blit(overlay, (0,0))
+            self.screen.blit(self._overlay_layer('paused', 160), (0,0))
             self._draw_center_text('PAUSE', self.large_font, (SCREEN_W//2, SCREEN_H//2))
             self._draw_center_text('Pressione P ou ESC para voltar', self.font, (SCREEN_W//2, SCREEN_H//2 + 40))
         elif self.state == 'gameover':
-            if self.score > self.best_score:
-                self.best_score = self.score
-                save_best_score(self.best_score)
-
-            overlay = pygame.Surface((SCREEN_W, SCREEN_H), pygame.SRCALPHA)
-            overlay.fill((0,0,0,200))
-            self.screen.blit(overlay, (0,0))
+            self.screen.blit(self._overlay_layer('gameover', 200), (0,0))
 
             self._draw_center_text('GAME OVER', self.large_font, (SCREEN_W//2, SCREEN_H//2 - 90))
             self._draw_center_text(f'Score final: {self.score}', self.font, (SCREEN_W//2, SCREEN_H//2 - 40))
@@ -408,20 +551,116 @@ class SnakeGame:
             if self.gameover_selection == 0:
                 pygame.draw.rect(self.screen, (220,220,220), icon_rect.inflate(14,10), border_radius=4)
             self._draw_restart_icon(self.screen, icon_rect.center, icon_size, color=BLACK)
-            lab = self.font.render('REINICIAR', False, BLACK if self.gameover_selection == 0 else (120,120,120))
+            lab = self.text_cache.render(self.font, 'REINICIAR', BLACK if self.gameover_selection == 0 else (120,120,120))
             self.screen.blit(lab, (icon_rect.centerx - lab.get_width()//2, icon_rect.bottom + 6))
 
             exit_rect = pygame.Rect(opts_center_x + spacing - icon_size//2, base_y - icon_size//2, icon_size, icon_size)
             if self.gameover_selection == 1:
                 pygame.draw.rect(self.screen, (220,220,220), exit_rect.inflate(14,10), border_radius=4)
             self._draw_exit_icon(self.screen, exit_rect.center, icon_size, color=BLACK)
-            lab2 = self.font.render('SAIR', False, BLACK if self.gameover_selection == 1 else (120,120,120))
+            lab2 = self.text_cache.render(self.font, 'SAIR', BLACK if self.gameover_selection == 1 else (120,120,120))
             self.screen.blit(lab2, (exit_rect.centerx - lab2.get_width()//2, exit_rect.bottom + 6))
 
-        pygame.display.flip()
+    # --- camadas pre-renderizadas
+    def _playfield_layer(self):
+        key = (self.screen.get_size(), self.grid_w, self.grid_h, TILE)
+        return self.layers.get('playfield', key, self._build_playfield)
+
+    def _build_playfield(self):
+        layer = pygame.Surface(self.screen.get_size()).convert()
+        layer.fill(DISPLAY_GREEN)
+
+        # --- DEMARCACAO DO HUD ---
+        if self.large_board:
+            # linha inteira acima da janela da camera (que comeca logo abaixo do HUD); o mundo da a volta: sem borda
+            pygame.draw.line(layer, BLACK, (0, HUD_TILES*TILE - 2), (SCREEN_W, HUD_TILES*TILE - 2), 2)
+            return layer
+        pygame.draw.line(layer, BLACK, (0, HUD_TILES*TILE - 1), (SCREEN_W, HUD_TILES*TILE - 1), 2)
+
+        offset_x, offset_y = self.get_game_area_offset()
+
+        # Area jogável
+        game_area_px_x = offset_x
+        game_area_px_y = offset_y
+        game_area_px_w = self.grid_w * TILE
+        game_area_px_h = self.grid_h * TILE
+
+        game_rect_bg = pygame.Rect(game_area_px_x, game_area_px_y, game_area_px_w, game_area_px_h)
+        pygame.draw.rect(layer, DISPLAY_GREEN, game_rect_bg)
+
+        # Borda
+        dot_size = max(1, TILE // 8)
+        dot_step = max(1, TILE // 4)
+
+        for x in range(0, game_area_px_w, dot_step):
+            pygame.draw.rect(layer, BLACK, (game_area_px_x + x, game_area_px_y, dot_size, dot_size)) # Top
+            pygame.draw.rect(layer, BLACK, (game_area_px_x + x, game_area_px_y + game_area_px_h - dot_size, dot_size, dot_size)) # Bottom
+
+        for y in range(0, game_area_px_h, dot_step):
+            pygame.draw.rect(layer, BLACK, (game_area_px_x, game_area_px_y + y, dot_size, dot_size)) # Left
+            pygame.draw.rect(layer, BLACK, (game_area_px_x + game_area_px_w - dot_size, game_area_px_y + y, dot_size, dot_size)) # Right
+        return layer
+
+    def _content_sprites(self):
+        # so o desenho de cada codigo de celula (fundo transparente), para os blits em lote sobre o fundo
+        return self.layers.get('content', TILE, self._build_content_sprites)
+
+    def _build_content_sprites(self):
+        def sprite():
+            surf = pygame.Surface((TILE, TILE), pygame.SRCALPHA).convert_alpha()
+            surf.fill((0, 0, 0, 0))
+            return surf
+
+        sprites = {}
+        seg_w = int(TILE * 0.7)
+        body = sprites[CELL_BODY] = sprite()
+        pygame.draw.rect(body, BLACK, ((TILE - seg_w)//2, (TILE - seg_w)//2, seg_w, seg_w), border_radius=max(1, seg_w//6))
+        obstacle = sprites[CELL_OBSTACLE] = sprite()
+        pygame.draw.rect(obstacle, BLACK, (TILE//8, TILE//8, TILE - TILE//4, TILE - TILE//4), border_radius=max(1, TILE//6))
+        food_size = int(TILE * 0.6)
+        for i, ftype in enumerate(FOOD_TYPES):
+            food = sprites[CELL_FOOD + i] = sprite()
+            pygame.draw.rect(food, FOOD_COLORS[ftype], ((TILE - food_size)//2, (TILE - food_size)//2, food_size, food_size), border_radius=2)
+        return sprites
+
+    def _tile_sprites(self):
+        # um tile pronto (fundo + conteudo) por codigo de celula da grade
+        return self.layers.get('tiles', TILE, self._build_tile_sprites)
+
+    def _build_tile_sprites(self):
+        def tile():
+            surf = pygame.Surface((TILE, TILE)).convert()
+            surf.fill(DISPLAY_GREEN)
+            return surf
+
+        sprites = {CELL_EMPTY: tile()}
+        for code, content in self._content_sprites().items():
+            sprites[code] = tile()
+            sprites[code].blit(content, (0, 0))
+        return sprites
+
+    def _obstacle_layer(self):
+        # invalidada pelo on_layout_changed a cada leva
+        return self.layers.get('obstacles', self.screen.get_size(), self._build_obstacles)
+
+    def _build_obstacles(self):
+        layer = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA).convert_alpha()
+        layer.fill((0, 0, 0, 0))
+        sprite = self._content_sprites()[CELL_OBSTACLE]
+        positions = self._cell_positions()
+        w = self.grid_w
+        layer.blits([(sprite, positions[y * w + x]) for obs in self.obstacles for x, y in obs], doreturn=False)
+        return layer
+
+    def _overlay_layer(self, name, alpha):
+        def build():
+            overlay = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
+            overlay.fill((0,0,0,alpha))
+            return overlay
+        return self.layers.get('overlay_' + name, self.screen.get_size(), build)
 
     def _draw_center_text(self, txt, font, pos):
-        surf = font.render(txt, False, BLACK)
+        surf = self.text_cache.render(font, txt, BLACK)
         r = surf.get_rect(center=pos)
         self.screen.blit(surf, r)
 
@@ -444,218 +683,164 @@ class SnakeGame:
         pygame.draw.line(surf, color, (cx-off, cy-off), (cx+off, cy+off), thick)
         pygame.draw.line(surf, color, (cx-off, cy+off), (cx+off, cy-off), thick)
 
-    # --- game step
-    def step(self):
-        head = self.snake[0]
-        dx, dy = self.direction
-        new_head = (head[0] + dx, head[1] + dy)
-        new_head = (new_head[0] % GRID_W, new_head[1] % GRID_H)
-
-        if any(new_head in obs for obs in self.obstacles):
-            self.state = 'gameover'
-            self.gameover_selection = 0
-            if self.score > self.best_score:
-                self.best_score = self.score
-                save_best_score(self.best_score)
-            return
-
-        # colisao no corpo
-        if new_head in self.snake:
-            self.state = 'gameover'
-            self.gameover_selection = 0
-            if self.score > self.best_score:
-                self.best_score = self.score
-                save_best_score(self.best_score)
-            return
-
-
-        self.snake.insert(0, new_head)
-
-        eaten_idx = None
-        eaten_food = None
-        for i, f in enumerate(self.foods):
-            if f['pos'] == new_head:
-                eaten_idx = i
-                eaten_food = f
-                break
-
-        if eaten_food:
-            ftype = eaten_food['type']
-            self.score += 1
-            self.eaten_count = getattr(self, 'eaten_count', 0) + 1
-
-            if ftype == 'purple':
-                self.speed = min(MAX_SPEED, self.speed + 0.5)
-                self.pending_grow += 1
-            elif ftype == 'red':
-                self.pending_grow += 2
-            elif ftype == 'blue':
-                self.speed = max(MIN_SPEED, self.speed - 0.5)
-                self.pending_grow += 1
-            elif ftype == 'orange':
-                if len(self.snake) > 0:
-                    self.snake.pop()
-                if len(self.snake) < MIN_SEGMENTS:
-                    self.state = 'gameover'
-                    if self.score > self.best_score:
-                        self.best_score = self.score
-                        save_best_score(self.best_score)
-                    if eaten_idx is not None:
-                        self.foods.pop(eaten_idx)
-                    return
-
-            self.hunger_timer = 0.0
-
-            if eaten_idx is not None:
-                self.foods.pop(eaten_idx)
-
-
-            if len(self.foods) == 0:
-                self.wave_number = getattr(self, 'wave_number', 1) + 1
-                n_new = random.randint(1, 3)
-                self.spawn_wave(n_new)
-
-
-            self.move_delay = 1.0 / self.speed
-
-
-        if self.pending_grow > 0:
-            self.pending_grow -= 1
-        else:
-            self.snake.pop()
-
-        if len(self.snake) < MIN_SEGMENTS:
-            self.state = 'gameover'
-            if self.score > self.best_score:
-                self.best_score = self.score
-                save_best_score(self.best_score)
-            self.gameover_selection = 0
-            return
-
-    def process_input_cmd(self, source, cmd):
-        map_short = {'U':'UP','D':'DOWN','L':'LEFT','R':'RIGHT','P':'PAUSE','X':'RESET'}
-        if len(cmd) == 1 and cmd in map_short:
-            cmd = map_short[cmd]
-
-        # gameover menu
-        if self.state == 'gameover':
-            if cmd in ('LEFT','A','ARROWLEFT'):
-                self.gameover_selection = max(0, self.gameover_selection - 1)
-            elif cmd in ('RIGHT','D','ARROWRIGHT'):
-                self.gameover_selection = min(1, self.gameover_selection + 1)
-            elif cmd in ('UP','W','ARROWUP'):
-                self.gameover_selection = max(0, self.gameover_selection - 1)
-            elif cmd in ('DOWN','S','ARROWDOWN'):
-                self.gameover_selection = min(1, self.gameover_selection + 1)
-            elif cmd == 'ENTER':
-                if self.gameover_selection == 0:
-                    self.start_new_game(initial_menu=False)
-                else:
-                    pygame.quit()
-                    sys.exit(0)
-            elif cmd == 'ESC':
-                self.start_new_game(initial_menu=True)
-            return
-
-        # controles
-        if cmd in ('UP','W','ARROWUP'):
-            self.try_set_direction((0,-1))
-        elif cmd in ('DOWN','S','ARROWDOWN'):
-            self.try_set_direction((0,1))
-        elif cmd in ('LEFT','A','ARROWLEFT'):
-            self.try_set_direction((-1,0))
-        elif cmd in ('RIGHT','D','ARROWRIGHT'):
-            self.try_set_direction((1,0))
-        elif cmd in ('PAUSE','P'):
-            if self.state == 'playing':
-                self.state = 'paused'
-            elif self.state == 'paused':
-                self.state = 'playing'
-        elif cmd in ('RESET','R'):
-            self.start_new_game(initial_menu=False)
-        elif cmd == 'ENTER':
-            if self.state == 'menu':
-                self.state = 'playing'
-        elif cmd == 'ESC':
-            if self.state in ('playing','paused','gameover'):
-                self.start_new_game(initial_menu=True)
-
-    def try_set_direction(self, new_dir):
-        # impede 180 graus
-        if (new_dir[0] == -self.direction[0] and new_dir[1] == -self.direction[1]):
-            return
-        self.next_direction = new_dir
-
-    def run(self):
-        stop_event = threading.Event()
-        t_udp = threading.Thread(target=udp_listener, args=(stop_event, input_queue, UDP_LISTEN_HOST, UDP_LISTEN_PORT), daemon=True)
-        t_udp.start()
-        if SERIAL_ENABLED:
-            t_ser = threading.Thread(target=serial_listener, args=(stop_event, input_queue, SERIAL_PORT, SERIAL_BAUD), daemon=True)
-            t_ser.start()
-
-        last_time = time.time()
+    def shutdown(self):
+        """Para as threads e grava o que ficou pendente (fechar a janela ou SAIR no menu)."""
+        if getattr(self, 'io', None) is not None:
+            self.io.stop()
+        if self.spectators is not None:
+            self.spectators.close()
+        if self.telemetry is not None:
+            # eventos do quadro atual ainda nao passaram pelo record do fim do quadro
+            self.telemetry.record(self, self.events)
+            self.events.clear()
+            self.telemetry.close()
+        self.scores.close()
+        pygame.quit()
+
+    def request_exit(self):
+        self.shutdown()
+        sys.exit(0)
+
+    def run(self, uncapped=False):
+        self.io = InputReactor(input_queue, udp_addr=(UDP_LISTEN_HOST, UDP_LISTEN_PORT),
+                               serial_port=SERIAL_PORT if SERIAL_ENABLED else None, serial_baud=SERIAL_BAUD,
+                               notify=_wake_main_loop)
+        self.io.start()
+        if SPECTATOR_ENABLED:
+            try:
+                self.spectators = SpectatorServer(UDP_LISTEN_HOST, SPECTATOR_PORT)
+            except OSError as e:
+                print('Falha ao abrir porta de espectadores:', e)
+        if TELEMETRY_ENABLED:
+            self.telemetry = TelemetryLog()
+
+        prof = self.profiler
+        last_time = time.perf_counter()
+        waited = None
         while True:
-            now = time.time()
-            dt = now - last_time
+            prof.frame()
+            now = time.perf_counter()
+            dt = min(now - last_time, MAX_FRAME_DT)
             last_time = now
 
-            for event in pygame.event.get():
+            local_batch = []
+            events = pygame.event.get()
+            if waited is not None:
+                # o evento que acordou o event.wait vem antes dos que chegaram depois
+                events.insert(0, waited)
+                waited = None
+            for event in events:
                 if event.type == pygame.QUIT:
-                    stop_event.set()
-                    pygame.quit()
+                    self.shutdown()
                     return
+                elif event.type == pygame.VIDEOEXPOSE:
+                    self.invalidate_screen()
                 elif event.type == pygame.KEYDOWN:
                     key = event.key
                     if key in (pygame.K_w, pygame.K_UP):
-                        input_queue.put(('local','UP'))
+                        local_batch.append(('local','UP',now))
                     elif key in (pygame.K_s, pygame.K_DOWN):
-                        input_queue.put(('local','DOWN'))
+                        local_batch.append(('local','DOWN',now))
                     elif key in (pygame.K_a, pygame.K_LEFT):
-                        input_queue.put(('local','LEFT'))
+                        local_batch.append(('local','LEFT',now))
                     elif key in (pygame.K_d, pygame.K_RIGHT):
-                        input_queue.put(('local','RIGHT'))
+                        local_batch.append(('local','RIGHT',now))
                     elif key == pygame.K_RETURN:
-                        input_queue.put(('local','ENTER'))
+                        local_batch.append(('local','ENTER',now))
                     elif key == pygame.K_p:
-                        input_queue.put(('local','PAUSE'))
+                        local_batch.append(('local','PAUSE',now))
                     elif key == pygame.K_ESCAPE:
-                        input_queue.put(('local','PAUSE'))
+                        local_batch.append(('local','PAUSE',now))
                     elif key == pygame.K_r:
-                        input_queue.put(('local','RESET'))
-
+                        local_batch.append(('local','RESET',now))
+                    elif key == pygame.K_F2:
+                        if event.mod & pygame.KMOD_SHIFT:
+                            self.dump_frame_trace()
+                        else:
+                            self.toggle_perf_overlay()
+                    elif key == pygame.K_F3:
+                        self.toggle_latency_overlay()
+                    elif key == pygame.K_F4:
+                        self.export_latency_csv()
+
+            if local_batch:
+                input_queue.put(local_batch)
+            prof.mark('events')
 
             try:
                 while True:
-                    source, cmd = input_queue.get_nowait()
-                    self.process_input_cmd(source, cmd)
+                    for source, cmd, t_recv in input_queue.get_nowait():
+                        self.handle_command(source, cmd, t_recv)
             except queue.Empty:
                 pass
+            prof.mark('input')
+
+            # movimentacao e fome em passos fixos de move_delay
+            if uncapped:
+                n_ticks = self.advance(float('inf'), max_ticks=UNCAPPED_TICKS_PER_FRAME)
+            else:
+                n_ticks = self.advance(dt)
+            self._note_ticks(n_ticks)
+            prof.mark('sim')
+
+            if self.events is not None:
+                if self.spectators is not None:
+                    self.spectators.publish(self, self.events)
+                if self.telemetry is not None:
+                    self.telemetry.record(self, self.events)
+                self.events.clear()
+            prof.mark('net')
 
-
-            if self.state == 'playing':
-                # relogio de fome
-                self.hunger_timer += dt
-                if self.hunger_timer >= self.hunger_limit:
-                    self.state = 'gameover'
-                    self.gameover_selection = 0
-                    if self.score > self.best_score:
-                        self.best_score = self.score
-                        save_best_score(self.best_score)
-
-                # movimentacao
-                self.move_timer += dt
-                if self.move_timer >= self.move_delay:
-                    self.direction = self.next_direction
-                    self.step()
-                    self.move_delay = 1.0 / self.speed
-                    self.move_timer = 0.0
+            self.draw()
+            self._note_presented()
+            if self.startup is None:
+                self._note_startup()
+            prof.mark('draw')
+            if uncapped:
+                self.clock.tick(0)
+            else:
+                waited = self._wait_for_work(now)
+            prof.mark('wait')
+
+    def _idle_timeout(self, frame_start):
+        """Quanto o loop pode dormir: ate o proximo tick jogando, IDLE_WAKE_INTERVAL nas telas paradas."""
+        if not IDLE_WAIT or self.show_perf:
+            return 0.0   # o grafico do overlay anda todo frame
+        to_tick = self.time_to_next_tick()
+        if to_tick is None:
+            return IDLE_WAKE_INTERVAL
+        return min(MAX_FRAME_DT, to_tick - (time.perf_counter() - frame_start))
+
+    def _wait_for_work(self, frame_start):
+        """Fim do frame: limita a RENDER_FPS ou dorme ate um evento/tick; retorna o evento que acordou, se houver."""
+        timeout = self._idle_timeout(frame_start)
+        if timeout <= (1.0 / RENDER_FPS if RENDER_FPS else 0.0):
+            self.clock.tick(RENDER_FPS)
+            return None
+        # arredonda para cima: acordar antes do tick custaria um frame de atraso
+        event = pygame.event.wait(int(math.ceil(timeout * 1000)))
+        self.clock.tick()
+        return None if event.type == pygame.NOEVENT else event
+
+
+def _wake_main_loop():
+    try:
+        pygame.event.post(pygame.event.Event(INPUT_READY_EVENT))
+    except pygame.error:
+        pass   # pygame ja encerrado
 
 
-            self.draw()
-            self.clock.tick(60)
+# comandos do front-end (teclado ou remoto), tratados antes do engine
+FRONTEND_ACTIONS = {
+    'PERF': SnakeGame.toggle_perf_overlay,
+    'PERFDUMP': SnakeGame.dump_frame_trace,
+}
 
 
 if __name__ == '__main__':
-    game = SnakeGame()
-    game.run()
\ No newline at end of file
+    # python "snake pygame.py" [--uncapped] [--board 512x512]
+    grid_w, grid_h = GRID_W, GRID_H
+    if '--board' in sys.argv:
+        grid_w, grid_h = map(int, sys.argv[sys.argv.index('--board') + 1].lower().split('x'))
+    game = SnakeGame(grid_w, grid_h)
+    game.run(uncapped='--uncapped' in sys.argv)
\ No newline at end of file
@@ -0,0 +1,332 @@
+import heapq
+import multiprocessing
+import statistics
+import sys
+import time
+from collections import Counter, deque
+
+from snake_engine import (SnakeEngine, GRID_W, GRID_H, MIN_SEGMENTS, DEFAULT_RULES,
+                          CELL_BODY, CELL_OBSTACLE, CELL_FOOD, FOOD_TYPES)
+
+# partidas que passam disso sao encerradas (o bot pode ficar muito tempo vivo)
+MAX_TICKS_PER_GAME = 20000
+# limite de nos expandidos por busca (em celulas do tabuleiro)
+SEARCH_BUDGET = 4
+UNREACHABLE = 0xFFFF
+
+DIRECTION_COMMANDS = {(0, -1): 'UP', (0, 1): 'DOWN', (-1, 0): 'LEFT', (1, 0): 'RIGHT'}
+_ORANGE = CELL_FOOD + FOOD_TYPES.index('orange')
+
+
+class Autopilot:
+    """
+    Jogador automatico que usa o caminho normal de comandos
+    (process_input_cmd com 'UP'/'DOWN'/...), sobre a grade toroidal do engine.
+
+    Para cada comida guarda um campo de distancias (BFS a partir dela,
+    contornando so os obstaculos; sem obstaculos e so o campo do toro vazio
+    deslocado). Esses campos so sao refeitos quando os obstaculos mudam
+    (nova leva ou nova partida): um movimento da cobra nao os invalida.
+
+    A cobra entra no A*, que usa o campo como heuristica exata e trata cada
+    segmento como livre depois que a cauda passar por ele. O caminho
+    planejado e reaproveitado tick a tick; so ha nova busca quando a comida
+    alvo some, os obstaculos mudam ou o proximo passo fica bloqueado.
+    Antes de seguir, confere se sobra espaco para o corpo (flood fill com
+    parada antecipada). Entre as comidas escolhe a que da para alcancar
+    antes de morrer de fome.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.fields = {}          # pos da comida -> array de distancias
+        self._layout = None       # engine.obstacles do momento em que os campos foram feitos
+        self.path = deque()       # proximas celulas (idx) ate o alvo
+        self.target = None
+        self.searches = 0
+        self.field_builds = 0
+        # vizinhos de cada celula no toro, calculados uma vez
+        w, h = engine.grid_w, engine.grid_h
+        self.neighbors = [((y * w + (x + 1) % w), (y * w + (x - 1) % w), ((y + 1) % h * w + x), ((y - 1) % h * w + x))
+                          for y in range(h) for x in range(w)]
+        # distancias a (0, 0) no toro sem obstaculos; o campo de qualquer comida e esse deslocado
+        self._free_rows = [[min(x, w - x) + min(y, h - y) for x in range(w)] for y in range(h)]
+
+    # --- campos de distancia
+    def _field(self, pos):
+        engine = self.engine
+        if engine.obstacles is not self._layout:
+            self.fields.clear()
+            self._layout = engine.obstacles
+        field = self.fields.get(pos)
+        if field is None:
+            field = self.fields[pos] = self._build_field(pos)
+            self.field_builds += 1
+        return field
+
+    def _build_field(self, pos):
+        if not self.engine.obstacles:
+            return self._shifted_free_field(pos)
+        w, neighbors = self.engine.grid_w, self.neighbors
+        dist = [UNREACHABLE] * len(self.engine.grid)
+        # obstaculos marcados como ja visitados: o laco interno so olha dist
+        tiles = [y * w + x for obs in self.engine.obstacles for x, y in obs]
+        for idx in tiles:
+            dist[idx] = -1
+        start = pos[1] * w + pos[0]
+        dist[start] = 0
+        frontier = [start]
+        d = 0
+        while frontier:
+            d += 1
+            nxt = []
+            append = nxt.append
+            for idx in frontier:
+                for n in neighbors[idx]:
+                    if dist[n] == UNREACHABLE:
+                        dist[n] = d
+                        append(n)
+            frontier = nxt
+        for idx in tiles:
+            dist[idx] = UNREACHABLE
+        return dist
+
+    def _shifted_free_field(self, pos):
+        px, py = pos
+        h = self.engine.grid_h
+        k = -px % self.engine.grid_w
+        field = []
+        for y in range(h):
+            row = self._free_rows[(y - py) % h]
+            field += row[k:]
+            field += row[:k]
+        return field
+
+    # --- ocupacao da cobra no tempo
+    def _free_after(self):
+        """idx -> numero de passos a partir do qual a celula do corpo fica livre."""
+        engine = self.engine
+        n = len(engine.snake)
+        grow = engine.pending_grow
+        w = engine.grid_w
+        return {y * w + x: n - i + grow for i, (x, y) in enumerate(engine.snake)}
+
+    def _search(self, target_pos, field, max_steps):
+        """A* da cabeca ate target_pos; retorna a lista de celulas (sem a cabeca) ou None."""
+        engine = self.engine
+        w, grid = engine.grid_w, engine.grid
+        hx, hy = engine.snake[0]
+        start = hy * w + hx
+        goal = target_pos[1] * w + target_pos[0]
+        if field[start] == UNREACHABLE:
+            return None
+        free_after = self._free_after()
+        budget = SEARCH_BUDGET * len(grid)
+        neighbors = self.neighbors
+        heappop, heappush = heapq.heappop, heapq.heappush
+        came = {start: None}
+        best = [UNREACHABLE] * len(grid)
+        best[start] = 0
+        heap = [(field[start], 0, start)]
+        self.searches += 1
+        while heap and budget > 0:
+            budget -= 1
+            f, g, idx = heappop(heap)
+            if idx == goal:
+                path = []
+                while idx != start:
+                    path.append(idx)
+                    idx = came[idx]
+                path.reverse()
+                return path
+            if g > best[idx]:
+                continue
+            g += 1
+            if g > max_steps:
+                continue
+            for n in neighbors[idx]:
+                code = grid[n]
+                if code == CELL_OBSTACLE:
+                    continue
+                # o corpo bloqueia ate a cauda passar (colisao e testada antes de a cauda andar)
+                if code == CELL_BODY and free_after.get(n, 0) >= g:
+                    continue
+                if g < best[n]:
+                    best[n] = g
+                    came[n] = idx
+                    heappush(heap, (g + field[n], g, n))
+        return None
+
+    def _room(self, first, need):
+        """Quantas celulas alcancaveis a partir de `first` depois do proximo passo (para em need)."""
+        engine = self.engine
+        grid = engine.grid
+        w = engine.grid_w
+        tail = engine.snake[-1]
+        tail_idx = tail[1] * w + tail[0]
+        tail_moves = engine.pending_grow == 0 and grid[first] < CELL_FOOD
+        seen = {first}
+        stack = [first]
+        while stack and len(seen) < need:
+            idx = stack.pop()
+            for n in self.neighbors[idx]:
+                if n in seen:
+                    continue
+                code = grid[n]
+                if code == CELL_OBSTACLE or (code == CELL_BODY and not (tail_moves and n == tail_idx)):
+                    continue
+                seen.add(n)
+                stack.append(n)
+        return len(seen)
+
+    def _safe_moves(self):
+        """Celulas vizinhas da cabeca onde da para entrar agora (a cauda ainda conta como corpo)."""
+        engine = self.engine
+        w = engine.grid_w
+        hx, hy = engine.snake[0]
+        out = []
+        for n in self.neighbors[hy * w + hx]:
+            code = engine.grid[n]
+            if code == CELL_OBSTACLE or code == CELL_BODY:
+                continue
+            if code == _ORANGE and len(engine.snake) - 1 < MIN_SEGMENTS:
+                continue
+            out.append(n)
+        return out
+
+    # --- decisao
+    def _plan(self):
+        engine = self.engine
+        length = len(engine.snake)
+        ticks_left = int((engine.hunger_limit - engine.hunger_timer) / engine.move_delay)
+        hx, hy = engine.snake[0]
+        w = engine.grid_w
+        head = hy * w + hx
+        options = []
+        for f in engine.foods:
+            if f['type'] == 'orange' and length - 1 < MIN_SEGMENTS:
+                continue
+            field = self._field(f['pos'])
+            if field[head] != UNREACHABLE:
+                options.append((field[head], f['pos'], field))
+        options.sort()
+        for _, pos, field in options:
+            path = self._search(pos, field, max(ticks_left, 1))
+            if path and self._room(path[0], length + 1) > length:
+                self.path = deque(path)
+                self.target = pos
+                return
+        self.path.clear()
+        self.target = None
+
+    def decide(self):
+        """Proxima direcao (dx, dy) ou None se nao ha movimento seguro."""
+        engine = self.engine
+        w = engine.grid_w
+        target_alive = self.target is not None and any(f['pos'] == self.target for f in engine.foods)
+        if (not self.path or not target_alive or engine.obstacles is not self._layout
+                or engine.grid[self.path[0]] in (CELL_BODY, CELL_OBSTACLE)):
+            self._plan()
+        safe = self._safe_moves()
+        if self.path and self.path[0] in safe:
+            nxt = self.path[0]
+        elif safe:
+            # sem caminho: vai para onde sobra mais espaco
+            need = len(engine.snake) * 2
+            nxt = max(safe, key=lambda n: self._room(n, need))
+            self.path.clear()
+        else:
+            return None
+        hx, hy = engine.snake[0]
+        y, x = divmod(nxt, w)
+        dx = (x - hx) % w
+        dy = (y - hy) % engine.grid_h
+        return (1 if dx == 1 else -1 if dx else 0, 1 if dy == 1 else -1 if dy else 0)
+
+    def tick(self):
+        """Escolhe, manda o comando pelo caminho normal e avanca um tick."""
+        engine = self.engine
+        d = self.decide()
+        if d is not None and d != engine.next_direction:
+            engine.process_input_cmd('bot', DIRECTION_COMMANDS[d])
+        engine.tick()
+        if self.path and engine.state == 'playing':
+            hx, hy = engine.snake[0]
+            if self.path[0] == hy * engine.grid_w + hx:
+                self.path.popleft()
+            else:
+                self.path.clear()
+
+
+# --- partidas sem supervisao
+def play_games(n_games, seed=0, rules=None, grid_w=GRID_W, grid_h=GRID_H, max_ticks=MAX_TICKS_PER_GAME):
+    """Joga n_games partidas com o autopiloto; retorna [(score, wave, length, cause, ticks)]."""
+    engine = SnakeEngine(grid_w, grid_h, seed=seed, rules=rules)
+    bot = Autopilot(engine)
+    results = []
+    for _ in range(n_games):
+        engine.start_new_game()
+        bot.path.clear()
+        while engine.state == 'playing' and engine.tick_count < max_ticks:
+            bot.tick()
+        cause = engine.death_cause if engine.state == 'gameover' else 'limit'
+        results.append((engine.score, engine.wave_number, len(engine.snake), cause, engine.tick_count))
+    return results
+
+
+def _play_chunk(args):
+    return play_games(*args)
+
+
+def run_parallel(n_games, seed=0, rules=None, processes=None, chunk=50):
+    jobs = [(min(chunk, n_games - i), seed + i, rules) for i in range(0, n_games, chunk)]
+    with multiprocessing.Pool(processes) as pool:
+        return [r for part in pool.map(_play_chunk, jobs) for r in part]
+
+
+def summarize(results):
+    scores = [r[0] for r in results]
+    causes = Counter(r[3] for r in results)
+    return {
+        'games': len(results),
+        'score_mean': statistics.mean(scores),
+        'score_median': statistics.median(scores),
+        'score_p90': sorted(scores)[int(len(scores) * 0.9)],
+        'wave_mean': statistics.mean(r[1] for r in results),
+        'ticks_mean': statistics.mean(r[4] for r in results),
+        'causes': {c: n / len(results) for c, n in causes.most_common()},
+    }
+
+
+def format_summary(label, s):
+    causes = ' '.join('%s %.0f%%' % (c, p * 100) for c, p in s['causes'].items())
+    return '%-24s score media %6.1f mediana %5.0f p90 %5d  wave %5.1f  ticks %7.0f  | %s' % (
+        label, s['score_mean'], s['score_median'], s['score_p90'], s['wave_mean'], s['ticks_mean'], causes)
+
+
+if __name__ == '__main__':
+    # python snake_autopilot.py N_PARTIDAS [--sweep regra v1,v2,...] [--processes P] [--seed S]
+    args = sys.argv[1:]
+
+    def option(name, default=None):
+        return args[args.index(name) + 1] if name in args else default
+
+    n_games = int(args[0]) if args and not args[0].startswith('--') else 1000
+    processes = int(option('--processes', 0)) or None
+    seed = int(option('--seed', 0))
+    sweep = option('--sweep')
+    if sweep:
+        if sweep not in DEFAULT_RULES:
+            sys.exit('regra desconhecida: %s (use %s)' % (sweep, ', '.join(DEFAULT_RULES)))
+        values = [float(v) if '.' in v else int(v) for v in args[args.index('--sweep') + 2].split(',')]
+    else:
+        sweep, values = None, [None]
+
+    for value in values:
+        rules = {sweep: value} if sweep else None
+        t0 = time.perf_counter()
+        results = run_parallel(n_games, seed, rules, processes)
+        elapsed = time.perf_counter() - t0
+        label = '%s=%s' % (sweep, value) if sweep else 'regras padrao'
+        print(format_summary(label, summarize(results)),
+              ' (%.0f partidas/min)' % (len(results) / elapsed * 60))
@@ -0,0 +1,330 @@
+import sys
+import time
+
+import numpy as np
+
+from snake_engine import (
+    GRID_W, GRID_H, SPEED, MIN_SPEED, MAX_SPEED, FOOD_TYPES, HUNGER_LIMIT,
+    MIN_SEGMENTS, OBSTACLES_AFTER_EATEN, ORANGE_ALLOWED_WAVE,
+    CAUSE_OBSTACLE, CAUSE_BODY, CAUSE_ORANGE, CAUSE_HUNGER, CAUSE_BOARD_FULL,
+    CELL_EMPTY, CELL_BODY, CELL_OBSTACLE, CELL_FOOD, OBSTACLE_SHAPES, PlacementMask,
+)
+
+FOOD_RED = FOOD_TYPES.index('red')
+FOOD_BLUE = FOOD_TYPES.index('blue')
+FOOD_PURPLE = FOOD_TYPES.index('purple')
+FOOD_ORANGE = FOOD_TYPES.index('orange')
+
+# direcoes: cima, baixo, esquerda, direita (oposta de d e d ^ 1)
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+DIR_DX = np.array([d[0] for d in DIRECTIONS], dtype=np.int32)
+DIR_DY = np.array([d[1] for d in DIRECTIONS], dtype=np.int32)
+
+# causas de fim de jogo (indice em CAUSES; 0 = ainda vivo)
+CAUSES = [None, CAUSE_OBSTACLE, CAUSE_BODY, CAUSE_ORANGE, CAUSE_HUNGER, CAUSE_BOARD_FULL]
+ALIVE, DEAD_OBSTACLE, DEAD_BODY, DEAD_ORANGE, DEAD_HUNGER, DEAD_BOARD_FULL = range(len(CAUSES))
+
+# triangulo 3x2 dos obstaculos, relativo a ancora (x, y)
+TRIANGLE = OBSTACLE_SHAPES['triangle']
+
+SAMPLE_ROUNDS = 64
+
+
+class BatchSnake:
+    """
+    Simula n_games partidas independentes de uma vez, com o estado inteiro
+    em arrays NumPy. Segue as mesmas regras do SnakeEngine.tick(): cada
+    passo avança 1/speed segundos de fome e um movimento da cobra.
+
+    Corpo de cada cobra: buffer circular de indices de celula (y*W + x),
+    com a cabeca em body[g, head_ptr[g]] e a cauda length-1 posicoes atras.
+    """
+
+    def __init__(self, n_games, grid_w=GRID_W, grid_h=GRID_H, seed=None, auto_reset=False):
+        self.n = int(n_games)
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self.cells = grid_w * grid_h
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+
+        n, cells = self.n, self.cells
+        self.grid = np.zeros((n, cells), dtype=np.uint8)
+        self.body = np.zeros((n, cells), dtype=np.int32)
+        self.head_ptr = np.zeros(n, dtype=np.int32)
+        self.length = np.zeros(n, dtype=np.int32)
+        self.direction = np.zeros(n, dtype=np.int8)
+        self.next_direction = np.zeros(n, dtype=np.int8)
+        self.food_left = np.zeros(n, dtype=np.int8)
+        self.score = np.zeros(n, dtype=np.int32)
+        self.eaten_count = np.zeros(n, dtype=np.int32)
+        self.wave_number = np.zeros(n, dtype=np.int32)
+        self.speed = np.zeros(n, dtype=np.float64)
+        self.pending_grow = np.zeros(n, dtype=np.int32)
+        self.hunger_timer = np.zeros(n, dtype=np.float64)
+        self.status = np.zeros(n, dtype=np.int8)
+        self.ticks = np.zeros(n, dtype=np.int64)
+
+        self.total_ticks = 0
+        self.finished = []
+        self.reset()
+
+    # --- ciclo de vida
+    def reset(self, games=None):
+        """Recomeça as partidas indicadas (todas se games for None)."""
+        idx = self._as_index(games)
+        if len(idx) == 0:
+            return
+        w = self.grid_w
+        cx, cy = self.grid_w // 2, self.grid_h // 2
+
+        self.grid[idx] = CELL_EMPTY
+        # cauda em body[0], cabeca em body[2]
+        start = [cy * w + (cx - 2) % w, cy * w + (cx - 1) % w, cy * w + cx]
+        for i, cell in enumerate(start):
+            self.body[idx, i] = cell
+            self.grid[idx, cell] = CELL_BODY
+        self.head_ptr[idx] = len(start) - 1
+        self.length[idx] = len(start)
+        self.direction[idx] = 3
+        self.next_direction[idx] = 3
+
+        self.score[idx] = 0
+        self.eaten_count[idx] = 0
+        self.wave_number[idx] = 1
+        self.speed[idx] = SPEED
+        self.pending_grow[idx] = 0
+        self.hunger_timer[idx] = 0.0
+        self.status[idx] = ALIVE
+        self.ticks[idx] = 0
+
+        self.spawn_wave(idx)
+
+    def _as_index(self, games):
+        if games is None:
+            return np.arange(self.n)
+        games = np.asarray(games)
+        if games.dtype == bool:
+            return np.flatnonzero(games)
+        return games.astype(np.intp, copy=False)
+
+    @property
+    def alive(self):
+        return self.status == ALIVE
+
+    # --- comandos
+    def set_directions(self, dirs):
+        """
+        dirs: array (n_games,) com indice em DIRECTIONS, ou -1 para manter.
+        Como o try_set_direction, ignora giros de 180 graus.
+        """
+        dirs = np.asarray(dirs, dtype=np.int8)
+        ok = (dirs >= 0) & (dirs != (self.direction ^ 1)) & self.alive
+        self.next_direction[ok] = dirs[ok]
+
+    # --- levas
+    def spawn_wave(self, games):
+        """Mesmo que SnakeEngine.spawn_wave, para um subconjunto de partidas."""
+        idx = self._as_index(games)
+        if len(idx) == 0:
+            return
+        sub = self.grid[idx]
+        sub[sub >= CELL_OBSTACLE] = CELL_EMPTY
+        self.grid[idx] = sub
+
+        n_foods = self.rng.integers(1, 4, size=len(idx))
+        self.food_left[idx] = 0
+        for k in range(3):
+            games_k = idx[n_foods > k]
+            cells = self._sample_free_cells(games_k)
+            placed = cells >= 0
+            games_k, cells = games_k[placed], cells[placed]
+            # laranja so a partir de ORANGE_ALLOWED_WAVE
+            n_types = np.where(self.wave_number[games_k] < ORANGE_ALLOWED_WAVE, len(FOOD_TYPES) - 1, len(FOOD_TYPES))
+            ftype = self.rng.integers(0, n_types)
+            self.grid[games_k, cells] = CELL_FOOD + ftype
+            self.food_left[games_k] += 1
+        # como o BoardFullError do SnakeEngine
+        self._kill(idx[self.food_left[idx] == 0], DEAD_BOARD_FULL)
+
+        with_obst = idx[self.eaten_count[idx] >= OBSTACLES_AFTER_EATEN]
+        if len(with_obst):
+            n_obst = self.rng.integers(1, 3, size=len(with_obst))
+            for k in range(2):
+                self._place_obstacles(with_obst[n_obst > k])
+
+    def _sample_free_cells(self, games):
+        """Uma celula livre aleatoria por partida (-1 se o tabuleiro estiver cheio)."""
+        out = np.full(len(games), -1, dtype=np.int64)
+        todo = np.arange(len(games))
+        for _ in range(SAMPLE_ROUNDS):
+            if len(todo) == 0:
+                return out
+            cand = self.rng.integers(0, self.cells, size=len(todo))
+            ok = self.grid[games[todo], cand] == CELL_EMPTY
+            out[todo[ok]] = cand[ok]
+            todo = todo[~ok]
+        # tabuleiros quase cheios: escolhe direto entre as celulas livres
+        for i in todo:
+            free = np.flatnonzero(self.grid[games[i]] == CELL_EMPTY)
+            if len(free):
+                out[i] = free[self.rng.integers(len(free))]
+        return out
+
+    def _place_obstacles(self, games):
+        """Um triangulo 3x2 por partida (se couber em algum lugar)."""
+        w = self.grid_w
+        todo = games
+        for _ in range(SAMPLE_ROUNDS):
+            if len(todo) == 0:
+                return
+            x = self.rng.integers(0, max(1, self.grid_w - 2), size=len(todo))
+            y = self.rng.integers(0, max(1, self.grid_h - 1), size=len(todo))
+            tiles = [(y + ty) * w + (x + tx) for tx, ty in TRIANGLE]
+            ok = np.ones(len(todo), dtype=bool)
+            for t in tiles:
+                ok &= self.grid[todo, t] == CELL_EMPTY
+            for t in tiles:
+                self.grid[todo[ok], t[ok]] = CELL_OBSTACLE
+            todo = todo[~ok]
+        # tabuleiros lotados: escolhe direto entre as ancoras validas
+        for g in todo:
+            mask = PlacementMask(self.grid[g], w, self.grid_h, TRIANGLE)
+            anchors = np.flatnonzero(np.frombuffer(mask.valid, dtype=np.uint8))
+            if len(anchors):
+                a = anchors[self.rng.integers(len(anchors))]
+                for tx, ty in TRIANGLE:
+                    self.grid[g, a + ty * w + tx] = CELL_OBSTACLE
+
+    # --- passo
+    def _pop_tail(self, games):
+        tail_ptr = (self.head_ptr[games] - self.length[games] + 1) % self.cells
+        tail = self.body[games, tail_ptr]
+        self.grid[games, tail] = CELL_EMPTY
+        self.length[games] -= 1
+
+    def _kill(self, games, cause):
+        self.status[games] = cause
+
+    def step(self):
+        """Avança um tick em todas as partidas vivas."""
+        w = self.grid_w
+        live = np.flatnonzero(self.status == ALIVE)
+        if len(live) == 0:
+            return
+
+        # relogio de fome
+        self.hunger_timer[live] += 1.0 / self.speed[live]
+        starving = self.hunger_timer[live] >= HUNGER_LIMIT
+        self._kill(live[starving], DEAD_HUNGER)
+        g = live[~starving]
+
+        self.direction[g] = self.next_direction[g]
+        head = self.body[g, self.head_ptr[g]]
+        d = self.direction[g]
+        nx = (head % w + DIR_DX[d]) % w
+        ny = (head // w + DIR_DY[d]) % self.grid_h
+        new_head = ny * w + nx
+        cell = self.grid[g, new_head]
+
+        hit_obst = cell == CELL_OBSTACLE
+        hit_body = cell == CELL_BODY
+        self._kill(g[hit_obst], DEAD_OBSTACLE)
+        self._kill(g[hit_body], DEAD_BODY)
+        moving = ~(hit_obst | hit_body)
+        g, new_head, cell = g[moving], new_head[moving], cell[moving]
+
+        self.head_ptr[g] = (self.head_ptr[g] + 1) % self.cells
+        self.body[g, self.head_ptr[g]] = new_head
+        self.grid[g, new_head] = CELL_BODY
+        self.length[g] += 1
+
+        ate = cell >= CELL_FOOD
+        eaters = g[ate]
+        if len(eaters):
+            ftype = cell[ate].astype(np.int32) - CELL_FOOD
+            self.score[eaters] += 1
+            self.eaten_count[eaters] += 1
+            self.food_left[eaters] -= 1
+
+            purple = eaters[ftype == FOOD_PURPLE]
+            self.speed[purple] = np.minimum(MAX_SPEED, self.speed[purple] + 0.5)
+            self.pending_grow[purple] += 1
+            self.pending_grow[eaters[ftype == FOOD_RED]] += 2
+            blue = eaters[ftype == FOOD_BLUE]
+            self.speed[blue] = np.maximum(MIN_SPEED, self.speed[blue] - 0.5)
+            self.pending_grow[blue] += 1
+
+            orange = eaters[ftype == FOOD_ORANGE]
+            self._pop_tail(orange)
+            too_short = orange[self.length[orange] < MIN_SEGMENTS]
+            self._kill(too_short, DEAD_ORANGE)
+
+            fed = eaters[self.status[eaters] == ALIVE]
+            self.hunger_timer[fed] = 0.0
+            new_wave = fed[self.food_left[fed] == 0]
+            self.wave_number[new_wave] += 1
+            self.spawn_wave(new_wave)
+
+        g = g[self.status[g] == ALIVE]
+        growing = self.pending_grow[g] > 0
+        self.pending_grow[g[growing]] -= 1
+        self._pop_tail(g[~growing])
+        self._kill(g[self.length[g] < MIN_SEGMENTS], DEAD_ORANGE)
+
+        self.ticks[live] += 1
+        self.total_ticks += len(live)
+
+        if self.auto_reset:
+            done = live[self.status[live] != ALIVE]
+            if len(done):
+                self.finished.append(self._results_for(done))
+                self.reset(done)
+
+    # --- resultados
+    def _results_for(self, games):
+        return np.stack([
+            self.score[games], self.wave_number[games], self.length[games],
+            self.status[games].astype(np.int32), self.ticks[games].astype(np.int32),
+        ], axis=1)
+
+    def results(self):
+        """
+        Array (partidas, 5): score, wave, tamanho, causa (indice em CAUSES), ticks.
+        Inclui as partidas terminadas (auto_reset) e as que ainda estao em andamento.
+        """
+        rows = self.finished + [self._results_for(np.arange(self.n))]
+        return np.concatenate(rows)
+
+    def game_state(self, g):
+        """Estado de uma partida no mesmo formato do SnakeEngine (para depurar)."""
+        w = self.grid_w
+        ptrs = (self.head_ptr[g] - np.arange(self.length[g])) % self.cells
+        snake = [(int(c % w), int(c // w)) for c in self.body[g, ptrs]]
+        foods = [{'pos': (int(c % w), int(c // w)), 'type': FOOD_TYPES[int(self.grid[g, c]) - CELL_FOOD]}
+                 for c in np.flatnonzero(self.grid[g] >= CELL_FOOD)]
+        obstacle_tiles = {(int(c % w), int(c // w)) for c in np.flatnonzero(self.grid[g] == CELL_OBSTACLE)}
+        return {'snake': snake, 'foods': foods, 'obstacle_tiles': obstacle_tiles,
+                'score': int(self.score[g]), 'wave_number': int(self.wave_number[g]),
+                'cause': CAUSES[int(self.status[g])]}
+
+
+def random_policy(batch, turn_prob=0.2):
+    """Vira para uma direcao aleatoria em ~turn_prob das partidas."""
+    dirs = batch.rng.integers(0, 4, size=batch.n).astype(np.int8)
+    dirs[batch.rng.random(batch.n) >= turn_prob] = -1
+    return dirs
+
+
+if __name__ == '__main__':
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    n_ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    batch = BatchSnake(n_games, seed=0, auto_reset=True)
+    t0 = time.perf_counter()
+    for _ in range(n_ticks):
+        batch.set_directions(random_policy(batch))
+        batch.step()
+    elapsed = time.perf_counter() - t0
+    res = batch.results()
+    print('%d partidas x %d ticks: %.0f ticks/s' % (n_games, n_ticks, batch.total_ticks / elapsed))
+    print('partidas terminadas: %d, score medio %.2f' % (len(res) - n_games, res[:, 0].mean()))
@@ -0,0 +1,282 @@
+import json
+import os
+import platform
+import random
+import runpy
+import sys
+import time
+
+# roda sem janela (precisa estar antes de importar pygame)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from snake_engine import SnakeEngine, CELL_EMPTY, CELL_BODY
+
+# --- CONFIG
+GRID_SIZES = [(56, 24), (128, 64), (256, 256), (1024, 1024)]
+SNAKE_LENGTHS = [3, 64, 1024, 16384]
+OBSTACLE_COUNTS = [0, 64, 4096]   # triangulos de 4 tiles
+QUICK_GRID_SIZES = [(56, 24), (256, 256)]
+QUICK_SNAKE_LENGTHS = [3, 1024]
+QUICK_OBSTACLE_COUNTS = [0, 64]
+# cobra + obstaculos ocupam no maximo essa fracao do tabuleiro
+MAX_FILL = 0.5
+DURATION = 0.5          # segundos medidos por benchmark
+SPAWN_REPEATS = 200
+# --compare: piora maior que isso e regressao
+REGRESSION_THRESHOLD = 1.20
+BENCH_FILE = 'bench_results.json'
+GAME_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snake pygame.py')
+
+# (dx, dy) e as duas direcoes perpendiculares
+_TURNS = {(1, 0): ((0, -1), (0, 1)), (-1, 0): ((0, -1), (0, 1)),
+          (0, 1): ((-1, 0), (1, 0)), (0, -1): ((-1, 0), (1, 0))}
+
+
+def _percentiles(samples, ps=(50, 95, 99)):
+    s = sorted(samples)
+    return [s[min(len(s) - 1, int(len(s) * p / 100.0))] for p in ps] if s else [0.0] * len(ps)
+
+
+def _setup_board(engine, length, n_obstacles, seed):
+    """
+    Partida nova com uma cobra de `length` segmentos em zigue-zague a partir
+    do canto (cabeca no fim) e n_obstacles triangulos. Sem fome, para a
+    medicao nao acabar por tempo.
+    """
+    engine.start_new_game(seed=seed)
+    engine.hunger_limit = float('inf')
+    for f in engine.foods:
+        engine._set_cell(f['pos'], CELL_EMPTY)
+    engine.foods = []
+    for seg in engine.snake:
+        engine._set_cell(seg, CELL_EMPTY)
+
+    w = engine.grid_w
+    path = []
+    for i in range(length):
+        y, x = divmod(i, w)
+        path.append((x if y % 2 == 0 else w - 1 - x, y))
+    for seg in path:
+        engine._set_cell(seg, CELL_BODY)
+    path.reverse()
+    engine.snake.clear()
+    engine.snake.extend(path)
+    y = (length - 1) // w
+    engine.direction = engine.next_direction = (1, 0) if y % 2 == 0 else (-1, 0)
+
+    engine.spawn_wave(3)
+    # como no spawn_wave, mas ficam ate a proxima leva
+    engine.place_obstacles(n_obstacles)
+    engine.on_layout_changed()
+
+
+def _steer(engine, rnd):
+    """Segue reto; se bloqueado vira para um lado livre. Comida conta como parede (sem novas levas)."""
+    hx, hy = engine.snake[0]
+    w, h, grid = engine.grid_w, engine.grid_h, engine.grid
+    d = engine.direction
+    turns = _TURNS[d]
+    if rnd.random() < 0.5:
+        turns = turns[::-1]
+    for dx, dy in (d,) + turns:
+        if grid[(hy + dy) % h * w + (hx + dx) % w] == CELL_EMPTY:
+            engine.next_direction = (dx, dy)
+            return
+
+
+def bench_step(engine, length, n_obstacles, duration, seed=0):
+    rnd = random.Random(seed)
+    _setup_board(engine, length, n_obstacles, seed)
+    samples = []
+    restarts = 0
+    perf = time.perf_counter
+    end = perf() + duration
+    while perf() < end:
+        for _ in range(256):
+            if engine.state != 'playing':
+                restarts += 1
+                _setup_board(engine, length, n_obstacles, seed + restarts)
+            _steer(engine, rnd)
+            t0 = perf()
+            engine.tick()
+            samples.append(perf() - t0)
+    p50, p95, p99 = _percentiles(samples)
+    return {'ticks': len(samples), 'ticks_per_sec': len(samples) / sum(samples),
+            'p50_us': p50 * 1e6, 'p95_us': p95 * 1e6, 'p99_us': p99 * 1e6, 'restarts': restarts}
+
+
+def bench_spawn_wave(engine, length, n_obstacles, repeats, seed=0):
+    samples = []
+    for i in range(repeats):
+        if i % 20 == 0:
+            # spawn_wave limpa os obstaculos: repoe a densidade de vez em quando
+            _setup_board(engine, length, n_obstacles, seed + i)
+        engine.eaten_count = engine.rules['obstacles_after_eaten']   # passa tambem pelo sorteio de pedras
+        t0 = time.perf_counter()
+        engine.spawn_wave(3)
+        samples.append(time.perf_counter() - t0)
+    p50, p95, p99 = _percentiles(samples)
+    return {'n': repeats, 'p50_us': p50 * 1e6, 'p95_us': p95 * 1e6, 'p99_us': p99 * 1e6,
+            'max_us': max(samples) * 1e6}
+
+
+def bench_draw(game, length, n_obstacles, duration, seed=0):
+    rnd = random.Random(seed)
+    _setup_board(game, length, n_obstacles, seed)
+    game.invalidate_screen()
+    game.draw()
+    # quadro a quadro: um tick e um draw incremental
+    samples = []
+    perf = time.perf_counter
+    end = perf() + duration
+    restarts = 0
+    while perf() < end:
+        if game.state != 'playing':
+            restarts += 1
+            _setup_board(game, length, n_obstacles, seed + restarts)
+        _steer(game, rnd)
+        game.tick()
+        t0 = perf()
+        game.draw()
+        samples.append(perf() - t0)
+    # repintura completa (menu, pausa, nova leva)
+    full = []
+    for _ in range(10):
+        game.invalidate_screen()
+        t0 = perf()
+        game.draw()
+        full.append(perf() - t0)
+    p50, p95, p99 = _percentiles(samples)
+    return {'frames': len(samples), 'fps': len(samples) / sum(samples),
+            'p50_ms': p50 * 1000, 'p95_ms': p95 * 1000, 'p99_ms': p99 * 1000,
+            'full_redraw_ms': _percentiles(full, (50,))[0] * 1000, 'restarts': restarts}
+
+
+def _load_game_class():
+    g = runpy.run_path(GAME_SCRIPT, run_name='snake_game')
+    return g['SnakeGame']
+
+
+def _new_game(game_class, grid_w, grid_h):
+    game = game_class(grid_w, grid_h)
+    # benchmark nao grava placar, replay nem eventos de espectador
+    game.on_game_over = lambda: None
+    game.recorder = None
+    game.events = None
+    game.state = 'playing'
+    return game
+
+
+def run_suite(grid_sizes=GRID_SIZES, lengths=SNAKE_LENGTHS, obstacle_counts=OBSTACLE_COUNTS,
+              duration=DURATION, draw=True, log=print):
+    game_class = None
+    if draw:
+        try:
+            game_class = _load_game_class()
+        except Exception as e:
+            log('draw desativado: %s' % e)
+            draw = False
+
+    results = []
+    for grid_w, grid_h in grid_sizes:
+        engine = SnakeEngine(grid_w, grid_h, seed=0)
+        game = None
+        cells = grid_w * grid_h
+        for length in lengths:
+            for n_obstacles in obstacle_counts:
+                if length + 4 * n_obstacles > cells * MAX_FILL:
+                    continue
+                row = {'grid': [grid_w, grid_h], 'length': length, 'obstacles': n_obstacles}
+                row['step'] = bench_step(engine, length, n_obstacles, duration)
+                row['spawn_wave'] = bench_spawn_wave(engine, length, n_obstacles, SPAWN_REPEATS)
+                if draw:
+                    if game is None:
+                        game = _new_game(game_class, grid_w, grid_h)
+                    row['draw'] = bench_draw(game, length, n_obstacles, duration)
+                results.append(row)
+                log(_format_row(row))
+        if game is not None:
+            game.scores.close()
+    return results
+
+
+def _format_row(row):
+    line = '%4dx%-4d len %-5d obst %-4d | step %9.0f t/s p95 %6.1fus | spawn p95 %7.1fus' % (
+        row['grid'][0], row['grid'][1], row['length'], row['obstacles'],
+        row['step']['ticks_per_sec'], row['step']['p95_us'], row['spawn_wave']['p95_us'])
+    d = row.get('draw')
+    if d and 'fps' in d:
+        line += ' | draw %7.0f fps full %6.1fms' % (d['fps'], d['full_redraw_ms'])
+    return line
+
+
+def metadata():
+    meta = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'platform': platform.platform(), 'machine': platform.machine()}
+    try:
+        import pygame
+        meta['pygame'] = pygame.version.ver
+    except Exception:
+        pass
+    return meta
+
+
+# --- comparacao entre duas execucoes
+# metrica -> True se maior e melhor
+COMPARED_METRICS = {('step', 'ticks_per_sec'): True, ('step', 'p95_us'): False,
+                    ('spawn_wave', 'p95_us'): False, ('draw', 'fps'): True,
+                    ('draw', 'full_redraw_ms'): False}
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """Lista de (chave, metrica, antigo, novo, razao) que pioraram mais que threshold."""
+    key = lambda r: (tuple(r['grid']), r['length'], r['obstacles'])
+    before = {key(r): r for r in old['results']}
+    regressions = []
+    for row in new['results']:
+        prev = before.get(key(row))
+        if prev is None:
+            continue
+        for (bench, metric), higher_better in COMPARED_METRICS.items():
+            a = prev.get(bench, {}).get(metric)
+            b = row.get(bench, {}).get(metric)
+            if not a or not b:
+                continue
+            ratio = a / b if higher_better else b / a
+            if ratio > threshold:
+                regressions.append((key(row), '%s.%s' % (bench, metric), a, b, ratio))
+    return regressions
+
+
+if __name__ == '__main__':
+    # python snake_bench.py [--quick] [--no-draw] [--out arquivo.json] [--compare anterior.json]
+    args = sys.argv[1:]
+
+    def option(name, default=None):
+        if name in args:
+            i = args.index(name)
+            return args[i + 1]
+        return default
+
+    quick = '--quick' in args
+    results = run_suite(QUICK_GRID_SIZES if quick else GRID_SIZES,
+                        QUICK_SNAKE_LENGTHS if quick else SNAKE_LENGTHS,
+                        QUICK_OBSTACLE_COUNTS if quick else OBSTACLE_COUNTS,
+                        duration=float(option('--duration', DURATION)),
+                        draw='--no-draw' not in args)
+    report = {'meta': metadata(), 'results': results}
+    out = option('--out', BENCH_FILE)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=1)
+    print('resultados em', out)
+
+    baseline = option('--compare')
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(json.load(f), report)
+        for (grid, length, obst), metric, a, b, ratio in regressions:
+            print('REGRESSAO %dx%d len %d obst %d: %s %.1f -> %.1f (%.2fx)'
+                  % (grid[0], grid[1], length, obst, metric, a, b, ratio))
+        print('%d regressoes (limite %.2fx)' % (len(regressions), REGRESSION_THRESHOLD))
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,629 @@
+import hashlib
+import random
+import struct
+from array import array
+from collections import deque
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# --- CONFIG das regras (sem nenhuma dependencia de display)
+GRID_W = 56 # Era 64, agora 30
+GRID_H = 24 # Era 32, agora 20
+
+SPEED = 8.0
+MIN_SPEED = 4.0
+MAX_SPEED = 25.0
+
+FOOD_TYPES = ['red', 'blue', 'purple', 'orange']
+
+HUNGER_LIMIT = 20.0
+
+MIN_SEGMENTS = 3
+
+OBSTACLES_AFTER_EATEN = 10
+
+ORANGE_ALLOWED_WAVE = 3
+
+# formatos de obstaculo: tiles relativos a ancora (canto superior esquerdo do retangulo do formato)
+OBSTACLE_SHAPES = {
+    'triangle': ((1, 0), (0, 1), (1, 1), (2, 1)),   # 3x2, ponta em cima
+    'bar': ((0, 0), (1, 0), (2, 0)),
+    'column': ((0, 0), (0, 1), (0, 2)),
+    'square': ((0, 0), (1, 0), (0, 1), (1, 1)),
+    'corner': ((0, 0), (0, 1), (1, 1)),
+}
+# sorteios de ancora antes de montar a mascara de posicoes validas (tabuleiro cheio)
+OBSTACLE_QUICK_TRIES = 16
+
+# giros guardados entre steps (o proximo + os que esperam na fila); 0 = so o ultimo comando vale
+TURN_BUFFER = 3
+
+# regras que cada engine pode trocar (SnakeEngine(rules={...})), ex.: testes de balanceamento
+DEFAULT_RULES = {
+    'hunger_limit': HUNGER_LIMIT,
+    'orange_allowed_wave': ORANGE_ALLOWED_WAVE,
+    'obstacles_after_eaten': OBSTACLES_AFTER_EATEN,
+    'obstacles_per_wave': (1, 2),          # sorteado entre min e max a cada leva
+    'obstacle_shapes': ('triangle',),      # nomes em OBSTACLE_SHAPES
+    'turn_buffer': TURN_BUFFER,
+}
+
+# no maximo quantos ticks de recuperacao por chamada de advance()
+MAX_CATCHUP_TICKS = 5
+
+# causas de fim de jogo
+CAUSE_OBSTACLE = 'obstacle'
+CAUSE_BODY = 'body'
+CAUSE_ORANGE = 'orange'
+CAUSE_HUNGER = 'hunger'
+CAUSE_BOARD_FULL = 'board_full'
+
+# conteudo de cada celula da grade de ocupacao
+CELL_EMPTY = 0
+CELL_BODY = 1
+CELL_OBSTACLE = 2
+CELL_FOOD = 3   # CELL_FOOD + indice em FOOD_TYPES
+
+# nomes alternativos de cada comando (teclado, ESP32, app)
+COMMAND_ALIASES = {
+    'U': 'UP', 'W': 'UP', 'ARROWUP': 'UP',
+    'D': 'DOWN', 'S': 'DOWN', 'ARROWDOWN': 'DOWN',
+    'L': 'LEFT', 'A': 'LEFT', 'ARROWLEFT': 'LEFT',
+    'R': 'RIGHT', 'ARROWRIGHT': 'RIGHT',
+    'P': 'PAUSE', 'X': 'RESET',
+}
+
+
+def canonical_command(cmd):
+    """Nome canonico de um comando ('W' -> 'UP', 'P' -> 'PAUSE', ...)."""
+    return COMMAND_ALIASES.get(cmd, cmd)
+
+
+class BoardFullError(Exception):
+    """Nao ha mais nenhuma celula livre no tabuleiro."""
+    pass
+
+
+class PlacementMask:
+    """
+    Todas as ancoras onde um formato cabe sem encostar em nada ocupado, numa
+    passada so pela grade: mascara deslizante (um AND por tile do formato)
+    em NumPy ou, sem NumPy, com a grade inteira num int de um byte por celula.
+    valid[y*grid_w + x] = 1 se a ancora (x, y) serve; sample() sorteia uma
+    com o rng do engine, na mesma ordem nos dois caminhos (replays iguais).
+    """
+
+    def __init__(self, grid, grid_w, grid_h, offsets):
+        self.grid_w = grid_w
+        self.offsets = offsets
+        self.span_w = grid_w - max(dx for dx, dy in offsets)
+        self.span_h = grid_h - max(dy for dx, dy in offsets)
+        if self.span_w <= 0 or self.span_h <= 0:
+            self.valid = bytearray(grid_w * grid_h)
+        elif NUMPY_AVAILABLE:
+            self.valid = self._build_numpy(grid, grid_w, grid_h)
+        else:
+            self.valid = self._build_bigint(grid, grid_w, grid_h)
+        self.count = self.valid.count(1)
+
+    def _build_numpy(self, grid, grid_w, grid_h):
+        free = np.frombuffer(grid, dtype=np.uint8).reshape(grid_h, grid_w) == CELL_EMPTY
+        h, w = self.span_h, self.span_w
+        window = np.ones((h, w), dtype=bool)
+        for dx, dy in self.offsets:
+            window &= free[dy:dy + h, dx:dx + w]
+        valid = np.zeros((grid_h, grid_w), dtype=np.uint8)
+        valid[:h, :w] = window
+        return bytearray(valid.tobytes())
+
+    def _build_bigint(self, grid, grid_w, grid_h):
+        # byte i do int = 1 se a celula i esta livre; deslocar dy*grid_w + dx bytes alinha o tile com a ancora
+        free = int.from_bytes(bytes(grid).translate(_FREE_TABLE), 'little')
+        row = b'\x01' * self.span_w + b'\x00' * (grid_w - self.span_w)
+        acc = int.from_bytes(row * self.span_h, 'little')   # so ancoras em que o formato cabe no tabuleiro
+        for dx, dy in self.offsets:
+            acc &= free >> (8 * (dy * grid_w + dx))
+        return bytearray(acc.to_bytes(grid_w * grid_h, 'little'))
+
+    def discard(self, tiles):
+        """Tiles que acabaram de ser ocupados: invalida as ancoras que os usariam."""
+        valid, w = self.valid, self.grid_w
+        for tx, ty in tiles:
+            for dx, dy in self.offsets:
+                ax, ay = tx - dx, ty - dy
+                if 0 <= ax < self.span_w and 0 <= ay < self.span_h and valid[ay * w + ax]:
+                    valid[ay * w + ax] = 0
+                    self.count -= 1
+
+    def sample(self, rng):
+        """Ancora (x, y) sorteada uniformemente entre as validas, ou None."""
+        if not self.count:
+            return None
+        k = rng.randrange(self.count)
+        valid, w = self.valid, self.grid_w
+        for start in range(0, len(valid), w):
+            n = valid.count(1, start, start + w)
+            if k >= n:
+                k -= n
+                continue
+            pos = valid.find(1, start, start + w)
+            for _ in range(k):
+                pos = valid.find(1, pos + 1, start + w)
+            return pos - start, start // w
+        return None
+
+
+# celula vazia -> 1, qualquer outra -> 0
+_FREE_TABLE = bytes([1] + [0] * 255)
+
+
+class SnakeEngine:
+    """
+    Regras do jogo sem pygame: cobra, comidas, levas, obstaculos e fome.
+    Pode ser usado sozinho (simulacao offline) ou como base do SnakeGame.
+
+    self.grid e uma grade de ocupacao (bytearray grid_w*grid_h, indice y*grid_w + x)
+    mantida junto com self.snake (deque, cabeca em [0]), self.foods e
+    self.obstacles, para que colisoes e celulas livres sejam testadas em O(1).
+    As celulas vazias ficam tambem num indice (self.free_cells + self.free_index,
+    remocao por troca com o ultimo), de onde as comidas sao sorteadas em O(1).
+    """
+
+    # se for um set, recebe o indice de toda celula da grade que mudar (renderizador incremental)
+    dirty_cells = None
+    # se definido (ver snake_render.ChunkIndex), indice espacial das celulas ocupadas
+    chunks = None
+    # se definido (ver snake_replay.ReplayRecorder), grava seed + comandos de cada partida
+    recorder = None
+    # se for uma lista, recebe os eventos da partida (ver _emit) para espectadores/telemetria
+    events = None
+
+    def __init__(self, grid_w=GRID_W, grid_h=GRID_H, initial_menu=False, seed=None, rules=None):
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self.rules = dict(DEFAULT_RULES)
+        for name, value in (rules or {}).items():
+            if name not in DEFAULT_RULES:
+                raise ValueError('regra desconhecida: %s' % name)
+            self.rules[name] = value
+        self.exit_requested = False
+        # cada partida tem sua propria seed, tirada daqui (seed=None: aleatoria)
+        self._seed_source = random.Random(seed)
+        self.start_new_game(initial_menu=initial_menu)
+
+    def spawn_wave(self, n_foods):
+        """
+        Cria uma nova leva:
+         - limpa comidas (e obstáculos)
+         - gera n_foods (1..3)
+         - gera rules['obstacles_per_wave'] pedras se self.eaten_count >= rules['obstacles_after_eaten']
+        Observação: chama-se spawn_wave tanto no início (onde wave_number já = 1)
+        quanto após cada reset — quando for um reset incrementamos wave_number antes de chamar.
+        """
+        n_foods = max(1, min(3, int(n_foods)))
+        for f in getattr(self, 'foods', []):
+            self._set_cell(f['pos'], CELL_EMPTY)
+        for obs in getattr(self, 'obstacles', []):
+            for t in obs:
+                self._set_cell(t, CELL_EMPTY)
+        self.foods = []
+        self.obstacles = []
+        if not self.free_cells:
+            raise BoardFullError()
+        while len(self.foods) < n_foods and self.free_cells:
+            self._add_food(self._create_food_candidate())
+
+        if getattr(self, 'eaten_count', 0) >= self.rules['obstacles_after_eaten']:
+            self.place_obstacles(self.rng.randint(*self.rules['obstacles_per_wave']))
+
+        if self.events is not None:
+            self._emit('wave', self.wave_number, [(f['pos'], f['type']) for f in self.foods],
+                       [t for obs in self.obstacles for t in obs], len(self.obstacles))
+        self.on_layout_changed()
+
+    def _create_food_candidate(self):
+        """Retorna a dict {'pos':(x,y), 'type':str} numa celula livre sorteada uniformemente.
+        Respeita a regra que a comida laranja só pode aparecer se wave_number >= rules['orange_allowed_wave'].
+        Levanta BoardFullError se não houver celula livre.
+        """
+        if not self.free_cells:
+            raise BoardFullError()
+        idx = self.free_cells[self.rng.randrange(len(self.free_cells))]
+        pos = (idx % self.grid_w, idx // self.grid_w)
+
+        allowed_types = FOOD_TYPES.copy()
+        if getattr(self, 'wave_number', 1) < self.rules['orange_allowed_wave']:
+            allowed_types.remove('orange')
+
+        ftype = self.rng.choice(allowed_types)
+        return {'pos': pos, 'type': ftype}
+
+    def place_obstacles(self, n):
+        """
+        Coloca ate n obstaculos (formatos de rules['obstacle_shapes']) em celulas
+        livres e retorna quantos couberam.
+
+        Cada um tenta OBSTACLE_QUICK_TRIES ancoras sorteadas (tabuleiro vazio:
+        quase sempre a primeira serve); se nenhuma servir, sorteia direto da
+        PlacementMask do formato, montada uma vez por chamada e atualizada a
+        cada obstaculo colocado. Tempo limitado mesmo com o tabuleiro lotado.
+        """
+        shapes = [OBSTACLE_SHAPES[name] for name in self.rules['obstacle_shapes']]
+        masks = {}
+        grid, w = self.grid, self.grid_w
+        placed = 0
+        for _ in range(n):
+            offsets = shapes[self.rng.randrange(len(shapes))] if len(shapes) > 1 else shapes[0]
+            max_x = self.grid_w - 1 - max(dx for dx, dy in offsets)
+            max_y = self.grid_h - 1 - max(dy for dx, dy in offsets)
+            if max_x < 0 or max_y < 0:
+                continue
+            anchor = None
+            for _ in range(OBSTACLE_QUICK_TRIES):
+                x = self.rng.randint(0, max_x)
+                y = self.rng.randint(0, max_y)
+                # snake, comidas e outros obstaculos estao todos na grade
+                if all(grid[(y + dy) * w + x + dx] == CELL_EMPTY for dx, dy in offsets):
+                    anchor = (x, y)
+                    break
+            if anchor is None:
+                mask = masks.get(offsets)
+                if mask is None:
+                    mask = masks[offsets] = PlacementMask(grid, w, self.grid_h, offsets)
+                anchor = mask.sample(self.rng)
+                if anchor is None:
+                    continue
+            x, y = anchor
+            tiles = {(x + dx, y + dy) for dx, dy in offsets}
+            self.obstacles.append(tiles)
+            for t in tiles:
+                self._set_cell(t, CELL_OBSTACLE)
+            for mask in masks.values():
+                mask.discard(tiles)
+            placed += 1
+        return placed
+
+    # --- grade de ocupacao
+    def _set_cell(self, pos, code):
+        idx = pos[1] * self.grid_w + pos[0]
+        was_empty = self.grid[idx] == CELL_EMPTY
+        self.grid[idx] = code
+        if self.dirty_cells is not None:
+            self.dirty_cells.add(idx)
+        if self.chunks is not None:
+            self.chunks.update(idx, code)
+        if was_empty and code != CELL_EMPTY:
+            # remove do indice trocando com o ultimo
+            i = self.free_index[idx]
+            last = self.free_cells.pop()
+            if last != idx:
+                self.free_cells[i] = last
+                self.free_index[last] = i
+            self.free_index[idx] = -1
+        elif not was_empty and code == CELL_EMPTY:
+            self.free_index[idx] = len(self.free_cells)
+            self.free_cells.append(idx)
+
+    def _cell_at(self, pos):
+        return self.grid[pos[1] * self.grid_w + pos[0]]
+
+    def _add_food(self, f):
+        self.foods.append(f)
+        self._set_cell(f['pos'], CELL_FOOD + FOOD_TYPES.index(f['type']))
+
+    # --- ciclo de vida basico do jogo
+    def start_new_game(self, initial_menu=False, seed=None):
+        self.game_seed = seed if seed is not None else self._seed_source.getrandbits(63)
+        self.rng = random.Random(self.game_seed)
+        self.tick_count = 0
+
+        cx, cy = self.grid_w//2, self.grid_h//2
+        n_cells = self.grid_w * self.grid_h
+        self.grid = bytearray(n_cells)
+        if self.chunks is not None:
+            self.chunks.clear()
+        self.free_cells = array('i', range(n_cells))
+        self.free_index = array('i', range(n_cells))
+        self.snake = deque([(cx, cy), (cx-1, cy), (cx-2, cy)])
+        for seg in self.snake:
+            self._set_cell(seg, CELL_BODY)
+        self.direction = (1, 0)
+        self.next_direction = self.direction
+        self.turn_queue = deque()   # giros depois do next_direction, um por step
+
+        self.foods = []
+        self.obstacles = []
+        self.eaten_count = 0
+
+        self.wave_number = 1
+
+
+        self.spawn_wave(self.rng.randint(1, 3))
+
+        self.score = 0
+        self.speed = float(SPEED)
+        self.move_timer = 0.0
+        self.move_delay = 1.0 / self.speed
+        self.pending_grow = 0
+        self.hunger_timer = 0.0
+        self.hunger_limit = self.rules['hunger_limit']
+        self.gameover_selection = 0
+        self.death_cause = None
+
+        self.state = 'menu' if initial_menu else 'playing'
+        if self.recorder is not None:
+            self.recorder.begin(self)
+        self._emit('reset')
+        self.on_layout_changed()
+
+    def _game_over(self, cause):
+        self.state = 'gameover'
+        self.gameover_selection = 0
+        self.death_cause = cause
+        if self.recorder is not None:
+            self.recorder.finish(self)
+        self._emit('death', cause)
+        self.on_game_over()
+
+    def _emit(self, *event):
+        """
+        Eventos: ('head', pos, direction), ('tail',), ('eat', pos, ftype), ('speed', speed),
+        ('wave', wave_number, [(pos, ftype)], [obstacle tiles], n_obstacles), ('reset',), ('death', cause).
+        Aplicados em ordem sobre o estado anterior, reconstroem a partida.
+        """
+        if self.events is not None:
+            self.events.append(event)
+
+    def on_game_over(self):
+        """Gancho chamado quando o jogo termina (o front-end salva o recorde aqui)."""
+        pass
+
+    def on_layout_changed(self):
+        """Gancho chamado quando spawn_wave/start_new_game trocam comidas, obstaculos ou a cobra inteira."""
+        pass
+
+    # --- game step
+    def step(self):
+        head = self.snake[0]
+        dx, dy = self.direction
+        new_head = (head[0] + dx, head[1] + dy)
+        new_head = (new_head[0] % self.grid_w, new_head[1] % self.grid_h)
+
+        cell = self._cell_at(new_head)
+        if cell == CELL_OBSTACLE:
+            self._game_over(CAUSE_OBSTACLE)
+            return
+
+        # colisao no corpo
+        if cell == CELL_BODY:
+            self._game_over(CAUSE_BODY)
+            return
+
+
+        self.snake.appendleft(new_head)
+        self._set_cell(new_head, CELL_BODY)
+        self._emit('head', new_head, self.direction)
+
+        eaten_idx = None
+        eaten_food = None
+        if cell >= CELL_FOOD:
+            for i, f in enumerate(self.foods):
+                if f['pos'] == new_head:
+                    eaten_idx = i
+                    eaten_food = f
+                    break
+
+        if eaten_food:
+            ftype = eaten_food['type']
+            self._emit('eat', new_head, ftype)
+            self.score += 1
+            self.eaten_count = getattr(self, 'eaten_count', 0) + 1
+
+            if ftype == 'purple':
+                self.speed = min(MAX_SPEED, self.speed + 0.5)
+                self._emit('speed', self.speed)
+                self.pending_grow += 1
+            elif ftype == 'red':
+                self.pending_grow += 2
+            elif ftype == 'blue':
+                self.speed = max(MIN_SPEED, self.speed - 0.5)
+                self._emit('speed', self.speed)
+                self.pending_grow += 1
+            elif ftype == 'orange':
+                if len(self.snake) > 0:
+                    self._set_cell(self.snake.pop(), CELL_EMPTY)
+                    self._emit('tail')
+                if len(self.snake) < MIN_SEGMENTS:
+                    if eaten_idx is not None:
+                        self.foods.pop(eaten_idx)
+                    self._game_over(CAUSE_ORANGE)
+                    return
+
+            self.hunger_timer = 0.0
+
+            if eaten_idx is not None:
+                self.foods.pop(eaten_idx)
+
+
+            if len(self.foods) == 0:
+                self.wave_number = getattr(self, 'wave_number', 1) + 1
+                n_new = self.rng.randint(1, 3)
+                try:
+                    self.spawn_wave(n_new)
+                except BoardFullError:
+                    self._game_over(CAUSE_BOARD_FULL)
+                    return
+
+
+            self.move_delay = 1.0 / self.speed
+
+
+        if self.pending_grow > 0:
+            self.pending_grow -= 1
+        else:
+            self._set_cell(self.snake.pop(), CELL_EMPTY)
+            self._emit('tail')
+
+        if len(self.snake) < MIN_SEGMENTS:
+            self._game_over(CAUSE_ORANGE)
+            return
+
+    def process_input_cmd(self, source, cmd):
+        # no menu as setas ja mudam a direcao inicial: entram no replay no tick 0
+        if self.recorder is not None and self.state != 'gameover':
+            self.recorder.record(self, cmd)
+
+        # despacho por tabela: alias -> comando canonico -> acao do estado atual
+        table = GAMEOVER_ACTIONS if self.state == 'gameover' else PLAY_ACTIONS
+        action = table.get(COMMAND_ALIASES.get(cmd, cmd))
+        if action is not None:
+            action(self)
+
+    # --- acoes dos comandos
+    def _move_selection(self, delta):
+        self.gameover_selection = max(0, min(1, self.gameover_selection + delta))
+
+    def _confirm_selection(self):
+        if self.gameover_selection == 0:
+            self.start_new_game(initial_menu=False)
+        else:
+            self.request_exit()
+
+    def _toggle_pause(self):
+        if self.state == 'playing':
+            self.state = 'paused'
+        elif self.state == 'paused':
+            self.state = 'playing'
+
+    def _enter(self):
+        if self.state == 'menu':
+            self.state = 'playing'
+
+    def _escape(self):
+        if self.state in ('playing','paused','gameover'):
+            self.start_new_game(initial_menu=True)
+
+    def request_exit(self):
+        """Opção SAIR do gameover; headless apenas marca o pedido."""
+        self.exit_requested = True
+
+    def tick_hunger(self, dt):
+        # relogio de fome
+        self.hunger_timer += dt
+        if self.hunger_timer >= self.hunger_limit:
+            self._game_over(CAUSE_HUNGER)
+
+    def tick(self):
+        """
+        Um passo de simulacao headless: o tempo avança exatamente move_delay
+        (o intervalo entre movimentos), sem relógio real.
+        """
+        if self.state != 'playing':
+            return
+        self.tick_count += 1
+        self.tick_hunger(self.move_delay)
+        if self.state != 'playing':
+            return
+        self.direction = self.next_direction
+        self.next_direction = self.turn_queue.popleft() if self.turn_queue else self.direction
+        self.step()
+
+    def advance(self, dt, max_ticks=MAX_CATCHUP_TICKS):
+        """
+        Passo fixo com acumulador: soma dt (segundos de relógio monotônico) e
+        executa quantos tick() couberem, guardando a sobra para o próximo frame.
+        Se passar de max_ticks, descarta o atraso em vez de entrar em espiral.
+        Retorna quantos ticks rodaram.
+        """
+        if self.state != 'playing':
+            return 0
+        self.move_timer += dt
+        n = 0
+        while self.state == 'playing' and self.move_timer >= self.move_delay:
+            if n >= max_ticks:
+                self.move_timer = 0.0
+                break
+            self.move_timer -= self.move_delay
+            self.tick()
+            n += 1
+        return n
+
+    def time_to_next_tick(self):
+        """Segundos de relogio que faltam para o proximo tick do advance(); None fora de jogo."""
+        if self.state != 'playing':
+            return None
+        return max(0.0, self.move_delay - self.move_timer)
+
+    def simulate(self, n_ticks):
+        """Roda até n_ticks ticks o mais rápido possível (sem relógio); para no fim do jogo."""
+        n = 0
+        while n < n_ticks and self.state == 'playing':
+            self.tick()
+            n += 1
+        return n
+
+    def state_hash(self):
+        """Hash (8 bytes) do estado da partida, para conferir replays."""
+        h = hashlib.blake2b(digest_size=8)
+        h.update(struct.pack('<QIIIIidd', self.game_seed, self.tick_count, self.score, self.wave_number,
+                             self.eaten_count, self.pending_grow, self.speed, self.hunger_timer))
+        h.update(str(self.state).encode())
+        h.update(struct.pack('<%di' % len(self.snake), *(y * self.grid_w + x for x, y in self.snake)))
+        h.update(self.grid)
+        return h.digest()
+
+    def try_set_direction(self, new_dir):
+        """
+        Guarda um giro. Cada step aplica um: o primeiro vira next_direction e os
+        seguintes esperam em turn_queue (ate rules['turn_buffer'] no total), entao
+        CIMA e ESQUERDA no mesmo tick viram dois movimentos. Cada giro e validado
+        contra o anterior da fila: repetido e 180 graus sao ignorados, e com a
+        fila cheia o comando e descartado.
+        """
+        limit = self.rules['turn_buffer']
+        if not limit:
+            # sem fila: o ultimo comando antes do step vence (replays antigos)
+            if (new_dir[0] == -self.direction[0] and new_dir[1] == -self.direction[1]):
+                return
+            self.next_direction = new_dir
+            return
+        pending = self.next_direction != self.direction
+        last = self.turn_queue[-1] if self.turn_queue else self.next_direction
+        if new_dir == last or (new_dir[0] == -last[0] and new_dir[1] == -last[1]):
+            return
+        if not pending:
+            self.next_direction = new_dir
+        elif len(self.turn_queue) < limit - 1:
+            self.turn_queue.append(new_dir)
+
+    def pending_turns(self):
+        """Giros aceitos que ainda nao foram aplicados por um step."""
+        return (self.next_direction != self.direction) + len(self.turn_queue)
+
+
+# gameover menu
+GAMEOVER_ACTIONS = {
+    'LEFT': lambda g: g._move_selection(-1),
+    'UP': lambda g: g._move_selection(-1),
+    'RIGHT': lambda g: g._move_selection(1),
+    'DOWN': lambda g: g._move_selection(1),
+    'ENTER': SnakeEngine._confirm_selection,
+    'ESC': lambda g: g.start_new_game(initial_menu=True),
+}
+
+# controles (menu, jogando, pausado)
+PLAY_ACTIONS = {
+    'UP': lambda g: g.try_set_direction((0,-1)),
+    'DOWN': lambda g: g.try_set_direction((0,1)),
+    'LEFT': lambda g: g.try_set_direction((-1,0)),
+    'RIGHT': lambda g: g.try_set_direction((1,0)),
+    'PAUSE': SnakeEngine._toggle_pause,
+    'RESET': lambda g: g.start_new_game(initial_menu=False),
+    'ENTER': SnakeEngine._enter,
+    'ESC': SnakeEngine._escape,
+}
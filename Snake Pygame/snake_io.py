@@ -0,0 +1,229 @@
+import os
+import selectors
+import socket
+import threading
+import time
+
+from snake_protocol import is_binary_packet, decode_control, ProtocolError, SequenceFilter, SerialFrameParser
+
+try:
+    import serial
+    SERIAL_AVAILABLE = True
+except Exception:
+    serial = None
+    SERIAL_AVAILABLE = False
+
+UDP_RECV_SIZE = 2048
+# quando a serial nao pode ir para o selector (Windows), ela e lida a cada SERIAL_POLL_INTERVAL
+SERIAL_POLL_INTERVAL = 0.005
+# porta UDP ocupada ou serial ausente (ESP32 desligado/desconectado): tenta de novo,
+# esperando o dobro a cada falha seguida (DEVICE_RETRY_MIN .. DEVICE_RETRY_MAX)
+DEVICE_RETRY_MIN = 0.5
+DEVICE_RETRY_MAX = 8.0
+
+
+class InputReactor:
+    """
+    Uma unica thread de I/O para o controle remoto: socket UDP e porta serial
+    no mesmo selectors.DefaultSelector. A cada acordada le TODOS os
+    datagramas e bytes pendentes e entrega um lote [(source, cmd, t_recv), ...]
+    com um so q.put(); t_recv e o time.perf_counter() do recebimento.
+    notify() (opcional) e chamado depois de cada put.
+    stop() acorda o select na hora (socketpair), sem esperar timeout.
+
+    Os dispositivos sao abertos na propria thread, sem segurar o jogo; o que
+    falhar (ou cair depois, ex.: ESP32 desplugado) e reaberto com backoff.
+
+    Na serial le tudo que estiver no buffer de uma vez e o SerialFrameParser
+    separa os quadros (linhas de texto ou pacotes binarios), contando os
+    malformados.
+
+    No UDP aceita texto (um comando por datagrama) ou o protocolo binario de
+    snake_protocol (varios comandos por pacote, pacotes velhos/duplicados descartados).
+    """
+
+    def __init__(self, q, udp_addr=None, serial_port=None, serial_baud=115200, notify=None):
+        self.q = q
+        self.notify = notify   # chamado (nesta thread) depois de cada lote, para acordar quem espera
+        self.udp_addr = udp_addr
+        self.serial_port = serial_port
+        self.serial_baud = serial_baud
+        self._stop = threading.Event()   # so pelo stop(), que tambem acorda o select
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._sock = None
+        self._ser = None
+        self._ser_polled = False
+        self.serial_parser = SerialFrameParser()
+        self.serial_reconnects = 0
+        self._serial_was_open = False
+        self._thread = None
+        self.seq_filter = SequenceFilter()
+        self.udp_malformed = 0
+        self.open_failures = 0
+        self._open_errors = {}   # dispositivo -> ultima mensagem de erro (so imprime quando muda)
+        self._retry_at = {}      # dispositivo -> proxima tentativa (perf_counter)
+        self._retry_delay = {}   # dispositivo -> espera atual do backoff
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass
+
+    # --- abertura dos dispositivos
+    def _open_failed(self, device, msg):
+        self.open_failures += 1
+        delay = self._retry_delay.get(device, DEVICE_RETRY_MIN)
+        self._retry_at[device] = time.perf_counter() + delay
+        self._retry_delay[device] = min(delay * 2, DEVICE_RETRY_MAX)
+        if self._open_errors.get(device) != msg:
+            self._open_errors[device] = msg
+            print(msg, '(tentando de novo com espera de ate %gs)' % DEVICE_RETRY_MAX)
+
+    def _opened(self, device):
+        self._retry_at.pop(device, None)
+        self._retry_delay.pop(device, None)
+        self._open_errors.pop(device, None)
+
+    def _open_devices(self, sel):
+        """Tenta abrir o que falta e ja passou da hora; retorna o tempo ate a proxima tentativa (ou None)."""
+        now = time.perf_counter()
+        if self.udp_addr is not None and self._sock is None and self._retry_at.get('udp', 0) <= now:
+            self._open_udp(sel)
+        if (self.serial_port is not None and SERIAL_AVAILABLE and self._ser is None
+                and self._retry_at.get('serial', 0) <= now):
+            self._open_serial(sel)
+        if not self._retry_at:
+            return None
+        return max(0.0, min(self._retry_at.values()) - time.perf_counter())
+
+    def _open_udp(self, sel):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.bind(self.udp_addr)
+        except OSError as e:
+            s.close()
+            self._open_failed('udp', 'Falha ao abrir UDP %s:%d: %s' % (self.udp_addr[0], self.udp_addr[1], e))
+            return
+        s.setblocking(False)
+        sel.register(s, selectors.EVENT_READ, self._read_udp)
+        self._sock = s
+        self._opened('udp')
+
+    def _open_serial(self, sel):
+        try:
+            ser = serial.Serial(self.serial_port, self.serial_baud, timeout=0)
+        except Exception as e:
+            self._open_failed('serial', 'Falha ao abrir serial: %s' % e)
+            return
+        if 'serial' in self._open_errors:
+            print('Serial %s aberta' % self.serial_port)
+        if self._serial_was_open:
+            self.serial_reconnects += 1
+        self._serial_was_open = True
+        self._opened('serial')
+        self.serial_parser.reset()
+        self._ser = ser
+        # no Windows o select so aceita sockets: a serial e consultada por polling
+        if os.name != 'nt' and hasattr(ser, 'fileno'):
+            sel.register(ser.fileno(), selectors.EVENT_READ, self._read_serial)
+        else:
+            self._ser_polled = True
+
+    # --- leitura
+    def _read_udp(self, batch):
+        while True:
+            try:
+                data, addr = self._sock.recvfrom(UDP_RECV_SIZE)
+            except (BlockingIOError, InterruptedError):
+                return
+            except ConnectionResetError:
+                # Windows: ICMP port unreachable de um envio anterior
+                continue
+            t_recv = time.perf_counter()
+            if is_binary_packet(data):
+                try:
+                    flags, seq, cmds = decode_control(data)
+                except ProtocolError:
+                    self.udp_malformed += 1
+                    continue
+                if self.seq_filter.accept(addr, seq, flags, t_recv):
+                    batch.extend(('udp', cmd, t_recv) for cmd in cmds)
+                continue
+            cmd = data.decode('utf-8', errors='ignore').strip().upper()
+            if cmd:
+                batch.append(('udp', cmd, t_recv))
+
+    def _read_serial(self, batch):
+        try:
+            waiting = self._ser.in_waiting
+            if not waiting:
+                return
+            data = self._ser.read(waiting)
+            t_recv = time.perf_counter()
+        except Exception as e:
+            # desplugado: fecha e o loop reabre com backoff
+            self._close_serial()
+            self._open_failed('serial', 'Serial desconectada: %s' % e)
+            return
+        batch.extend(('serial', cmd, t_recv) for cmd in self.serial_parser.feed(data))
+
+    def _read_wake(self, batch):
+        try:
+            while self._wake_r.recv(64):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _close_serial(self):
+        if self._ser is None:
+            return
+        if not self._ser_polled:
+            try:
+                self._sel.unregister(self._ser.fileno())
+            except Exception:
+                pass
+        try:
+            self._ser.close()
+        except Exception:
+            pass
+        self._ser = None
+        self._ser_polled = False
+
+    # --- loop
+    def run(self):
+        sel = self._sel = selectors.DefaultSelector()
+        sel.register(self._wake_r, selectors.EVENT_READ, self._read_wake)
+        if self.serial_port is not None and not SERIAL_AVAILABLE:
+            print('pyserial não disponível; serial desativado')
+
+        while not self._stop.is_set():
+            timeout = SERIAL_POLL_INTERVAL if self._ser_polled else None
+            retry = self._open_devices(sel)
+            if retry is not None:
+                timeout = retry if timeout is None else min(timeout, retry)
+            batch = []
+            for key, mask in sel.select(timeout):
+                key.data(batch)
+            if self._ser_polled:
+                self._read_serial(batch)
+            if batch:
+                self.q.put(batch)
+                if self.notify is not None:
+                    self.notify()
+
+        self._close_serial()
+        if self._sock is not None:
+            sel.unregister(self._sock)
+            self._sock.close()
+        sel.close()
+        self._wake_r.close()
+        self._wake_w.close()
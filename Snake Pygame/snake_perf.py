@@ -0,0 +1,170 @@
+import bisect
+import time
+from array import array
+
+# limites superiores dos baldes do histograma: 0.1 ms, 0.2 ms, 0.4 ms ... ~52 s
+LATENCY_BUCKETS = [0.0001 * 2 ** k for k in range(20)]
+
+# estagios medidos para cada comando, a partir do recebimento
+LATENCY_STAGES = ('drain', 'apply', 'present')
+
+
+class LatencyHistogram:
+    """Histograma em baldes logaritmicos (tamanho fixo, add() em O(log baldes))."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        """Limite superior do balde onde cai o percentil p (0..100), no maximo o valor maximo visto."""
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100.0
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target:
+                return min(LATENCY_BUCKETS[i], self.max) if i < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class LatencyTracker:
+    """
+    Latencia ponta a ponta dos comandos, por origem (udp, serial, local) e estagio:
+     - drain:   recebido -> retirado da fila pelo loop principal
+     - apply:   recebido -> direcao aplicada num step()
+     - present: recebido -> primeiro frame apresentado depois do step
+    """
+
+    def __init__(self):
+        self.hists = {}
+
+    def record(self, source, stage, seconds):
+        key = (source, stage)
+        h = self.hists.get(key)
+        if h is None:
+            h = self.hists[key] = LatencyHistogram()
+        h.add(seconds)
+
+    def rows(self):
+        """(source, stage, count, mean, p50, p95, p99, max) em segundos, ordenado."""
+        order = {s: i for i, s in enumerate(LATENCY_STAGES)}
+        out = []
+        for (source, stage), h in sorted(self.hists.items(), key=lambda kv: (kv[0][0], order.get(kv[0][1], 99))):
+            out.append((source, stage, h.count, h.mean, h.percentile(50), h.percentile(95), h.percentile(99), h.max))
+        return out
+
+    def summary_lines(self):
+        return ['%-6s %-7s n=%-5d p50 %6.1fms p95 %6.1fms max %6.1fms' % (src, stage, n, p50 * 1000, p95 * 1000, mx * 1000)
+                for src, stage, n, mean, p50, p95, p99, mx in self.rows()]
+
+    def to_csv(self):
+        lines = ['source,stage,count,mean_ms,p50_ms,p95_ms,p99_ms,max_ms']
+        for src, stage, n, mean, p50, p95, p99, mx in self.rows():
+            lines.append('%s,%s,%d,%.3f,%.3f,%.3f,%.3f,%.3f' % (src, stage, n, mean * 1000, p50 * 1000, p95 * 1000, p99 * 1000, mx * 1000))
+        return '\n'.join(lines) + '\n'
+
+
+# fases de um frame do loop principal, na ordem em que acontecem
+FRAME_PHASES = ('events', 'input', 'sim', 'net', 'draw', 'present', 'wait')
+
+
+class FrameProfiler:
+    """
+    Tempo de cada fase do frame num buffer circular de tamanho fixo.
+
+    O loop chama frame() no inicio de cada frame e mark(fase) ao fim de cada
+    fase; mark soma o tempo desde a marca anterior na fase (pode ser chamado
+    mais de uma vez por frame). Desligado (enabled = False), frame() e mark()
+    retornam na primeira linha: da para deixar sempre no codigo.
+    """
+
+    def __init__(self, capacity=600, enabled=True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.starts = array('d', bytes(8 * capacity))
+        self.phases = {p: array('d', bytes(8 * capacity)) for p in FRAME_PHASES}
+        self.totals = array('d', bytes(8 * capacity))
+        self.count = 0      # frames gravados (ate capacity)
+        self.pos = 0        # proxima posicao do buffer
+        self._cur = None
+        self._t0 = self._last = 0.0
+
+    def frame(self):
+        if not self.enabled:
+            return
+        t = time.perf_counter()
+        if self._cur is not None:
+            i = self.pos
+            self.starts[i] = self._t0
+            for phase, dt in self._cur.items():
+                self.phases[phase][i] = dt
+            self.totals[i] = t - self._t0
+            self.pos = (i + 1) % self.capacity
+            if self.count < self.capacity:
+                self.count += 1
+        self._cur = dict.fromkeys(FRAME_PHASES, 0.0)
+        self._t0 = self._last = t
+
+    def mark(self, phase):
+        if not self.enabled:
+            return
+        t = time.perf_counter()
+        cur = self._cur
+        if cur is not None:
+            cur[phase] += t - self._last
+        self._last = t
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self._cur = None
+
+    def _ordered(self, values):
+        """Valores do buffer do mais velho para o mais novo."""
+        if self.count < self.capacity:
+            return values[:self.count]
+        return values[self.pos:] + values[:self.pos]
+
+    def recent_totals(self, n):
+        return self._ordered(self.totals)[-n:]
+
+    def percentiles(self, ps=(50, 95, 99)):
+        """{fase: [p...]} em segundos, incluindo 'frame' (tempo total)."""
+        out = {}
+        if not self.count:
+            return out
+        series = dict(self.phases)
+        series['frame'] = self.totals
+        for name, values in series.items():
+            s = sorted(self._ordered(values))
+            out[name] = [s[min(len(s) - 1, int(len(s) * p / 100.0))] for p in ps]
+        return out
+
+    def summary_lines(self):
+        pct = self.percentiles()
+        if not pct:
+            return ['sem frames gravados']
+        return ['%-7s p50 %5.2fms p95 %5.2fms p99 %5.2fms' % (name, p50 * 1000, p95 * 1000, p99 * 1000)
+                for name, (p50, p95, p99) in ((n, pct[n]) for n in FRAME_PHASES + ('frame',))]
+
+    def to_csv(self):
+        lines = ['start_s,' + ','.join('%s_ms' % p for p in FRAME_PHASES) + ',total_ms']
+        cols = [self._ordered(self.starts)] + [self._ordered(self.phases[p]) for p in FRAME_PHASES] \
+            + [self._ordered(self.totals)]
+        for row in zip(*cols):
+            lines.append('%.6f,' % row[0] + ','.join('%.3f' % (v * 1000) for v in row[1:]))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,334 @@
+import struct
+
+# --- protocolo binario de controle (UDP), convive com o de texto
+#  magic u8 (0xA5, nunca e ASCII), versao u8, flags u8, seq u16, n u8, n opcodes u8
+CONTROL_MAGIC = 0xA5
+CONTROL_VERSION = 1
+CONTROL_HEADER = struct.Struct('>BBBHB')
+MAX_COMMANDS_PER_PACKET = 255
+
+# flags
+FLAG_RESET_SEQ = 0x01   # primeiro pacote depois de ligar: aceita qualquer seq
+
+CONTROL_OPCODES = {
+    'UP': 0x01, 'DOWN': 0x02, 'LEFT': 0x03, 'RIGHT': 0x04,
+    'PAUSE': 0x05, 'ENTER': 0x06, 'RESET': 0x07, 'ESC': 0x08,
+}
+CONTROL_COMMANDS = {op: cmd for cmd, op in CONTROL_OPCODES.items()}
+
+# um remetente calado por mais que isso pode ter reiniciado: aceita qualquer seq
+SEQ_IDLE_RESET = 5.0
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def is_binary_packet(data):
+    return len(data) > 0 and data[0] == CONTROL_MAGIC
+
+
+def encode_control(seq, commands, reset=False):
+    if len(commands) > MAX_COMMANDS_PER_PACKET:
+        raise ProtocolError('comandos demais num pacote')
+    flags = FLAG_RESET_SEQ if reset else 0
+    header = CONTROL_HEADER.pack(CONTROL_MAGIC, CONTROL_VERSION, flags, seq & 0xFFFF, len(commands))
+    return header + bytes(CONTROL_OPCODES[c] for c in commands)
+
+
+def decode_control(data):
+    """Retorna (flags, seq, [comando, ...]); opcodes desconhecidos sao ignorados."""
+    if len(data) < CONTROL_HEADER.size:
+        raise ProtocolError('pacote curto')
+    magic, version, flags, seq, n = CONTROL_HEADER.unpack_from(data)
+    if magic != CONTROL_MAGIC:
+        raise ProtocolError('magic invalido')
+    if version != CONTROL_VERSION:
+        raise ProtocolError('versao desconhecida: %d' % version)
+    ops = data[CONTROL_HEADER.size:CONTROL_HEADER.size + n]
+    if len(ops) != n:
+        raise ProtocolError('pacote truncado')
+    get = CONTROL_COMMANDS.get
+    return flags, seq, [cmd for cmd in map(get, ops) if cmd is not None]
+
+
+class SequenceFilter:
+    """
+    Descarta pacotes duplicados ou atrasados por remetente: so passa seq
+    estritamente mais novo que o ultimo aceito (aritmetica modulo 2^16).
+    """
+
+    def __init__(self, idle_reset=SEQ_IDLE_RESET):
+        self.idle_reset = idle_reset
+        self._last = {}   # addr -> (seq, t)
+        self.dropped = 0
+
+    def accept(self, addr, seq, flags, now):
+        last = self._last.get(addr)
+        if last is not None and not (flags & FLAG_RESET_SEQ) and now - last[1] < self.idle_reset:
+            diff = (seq - last[0]) & 0xFFFF
+            if diff == 0 or diff >= 0x8000:
+                self.dropped += 1
+                return False
+        self._last[addr] = (seq, now)
+        return True
+
+
+# --- serial: texto e binario no mesmo fluxo de bytes
+# linha de texto maior que isso sem \n e lixo (baud errado, ruido): descarta ate o proximo \n
+MAX_SERIAL_LINE = 64
+
+
+class SerialFrameParser:
+    """
+    Parser incremental do fluxo da serial. feed() recebe o que chegou (qualquer
+    tamanho, inclusive quadros pela metade) e devolve os comandos completos.
+
+    Um quadro e uma linha de texto terminada em \n (\r opcional) ou um pacote
+    binario de controle: comeca com CONTROL_MAGIC e o tamanho vem do cabecalho.
+    Cabecalho invalido descarta so o byte do magic, sem esperar o corpo (um 0xA5
+    de ruido nao segura os comandos seguintes); como o texto e ASCII, um
+    CONTROL_MAGIC no meio de uma linha tambem comeca um quadro novo. Opcodes nunca
+    sao \n: corpo com \n e pacote cortado e o parser ressincroniza depois dele.
+    Linha com bytes nao imprimiveis ou longa demais conta em malformed.
+    """
+
+    def __init__(self, max_line=MAX_SERIAL_LINE):
+        self.max_line = max_line
+        self.malformed = 0
+        self.frames = 0
+        self._buf = bytearray()
+        self._discarding = False
+
+    def reset(self):
+        """Esquece quadro pela metade (porta reaberta)."""
+        self._buf.clear()
+        self._discarding = False
+
+    def feed(self, data):
+        buf = self._buf
+        buf += data
+        cmds = []
+        pos = 0
+        n = len(buf)
+        header = CONTROL_HEADER.size
+        while pos < n:
+            if self._discarding:
+                end = _frame_end(buf, pos, n)
+                if end < 0:
+                    pos = n
+                    break
+                pos = end + (buf[end] == 0x0A)
+                self._discarding = False
+                continue
+
+            if buf[pos] == CONTROL_MAGIC:
+                if n - pos > 1 and buf[pos + 1] != CONTROL_VERSION:
+                    self.malformed += 1
+                    pos += 1
+                    continue
+                if n - pos < header:
+                    break
+                size = header + buf[pos + header - 1]
+                nl = buf.find(b'\n', pos + header, min(n, pos + size))
+                if nl >= 0:
+                    self.malformed += 1
+                    pos = nl + 1
+                    continue
+                if n - pos < size:
+                    break
+                try:
+                    flags, seq, frame_cmds = decode_control(bytes(buf[pos:pos + size]))
+                except ProtocolError:
+                    self.malformed += 1
+                    pos += 1
+                    continue
+                cmds += frame_cmds
+                self.frames += 1
+                pos += size
+                continue
+
+            end = _frame_end(buf, pos, min(n, pos + self.max_line + 1))
+            if end < 0:
+                if n - pos > self.max_line:
+                    self.malformed += 1
+                    self._discarding = True
+                    continue
+                break
+            line = bytes(buf[pos:end]).strip()
+            truncated = buf[end] != 0x0A
+            pos = end + (not truncated)
+            if not line:
+                continue
+            self.frames += 1
+            if truncated or not line.isascii():
+                self.malformed += 1
+                continue
+            text = line.decode('ascii')
+            if not text.isprintable():
+                self.malformed += 1
+                continue
+            cmds.append(text.upper())
+        del buf[:pos]
+        return cmds
+
+
+def _frame_end(buf, start, stop):
+    """Posicao do primeiro \\n ou CONTROL_MAGIC em buf[start:stop], ou -1."""
+    nl = buf.find(b'\n', start, stop)
+    magic = buf.find(CONTROL_MAGIC, start, nl if nl >= 0 else stop)
+    return magic if magic >= 0 else nl
+
+
+# --- fluxo de estado para espectadores (UDP, servidor -> viewers)
+#  cabecalho: magic u8 (0xA6), tipo u8, seq u32, tick u32
+#  status:    estado u8, score u16, wave u16, fome restante u8 (s), speed*2 u8
+#  keyframe:  grid_w u16, grid_h u16, cabeca u32, tamanho u32, direcoes 2 bits/segmento,
+#             n comidas u8 + (celula u32, tipo u8), n tiles de obstaculo u16 + celula u32
+#  delta:     n eventos u16 + eventos (HEAD dir u8 | TAIL | EAT | WAVE comidas + obstaculos)
+STREAM_MAGIC = 0xA6
+STREAM_KEYFRAME = 1
+STREAM_DELTA = 2
+STREAM_HEADER = struct.Struct('>BBII')
+STREAM_STATUS = struct.Struct('>BHHBB')
+
+STREAM_STATES = ['menu', 'playing', 'paused', 'gameover']
+STREAM_FOODS = ['red', 'blue', 'purple', 'orange']
+# direcoes: cima, baixo, esquerda, direita
+STREAM_DIRS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+_DIR_INDEX = {d: i for i, d in enumerate(STREAM_DIRS)}
+
+EV_HEAD = 1
+EV_TAIL = 2
+EV_EAT = 3
+EV_WAVE = 4
+
+SUBSCRIBE = b'HELLO'
+KEYFRAME_REQUEST = b'KEY'
+
+
+def _pack_status(out, state, score, wave, hunger_left, speed):
+    out += STREAM_STATUS.pack(STREAM_STATES.index(state), min(score, 0xFFFF), min(wave, 0xFFFF),
+                              max(0, min(255, int(hunger_left + 0.999))), int(speed * 2))
+
+
+def _pack_board_items(out, grid_w, foods, obstacle_tiles):
+    out.append(len(foods))
+    for (x, y), ftype in foods:
+        out += struct.pack('>IB', y * grid_w + x, STREAM_FOODS.index(ftype))
+    out += struct.pack('>H', len(obstacle_tiles))
+    for x, y in obstacle_tiles:
+        out += struct.pack('>I', y * grid_w + x)
+
+
+def unpack_board_items(data, pos, grid_w):
+    n = data[pos]
+    pos += 1
+    foods = {}
+    for _ in range(n):
+        cell, t = struct.unpack_from('>IB', data, pos)
+        foods[(cell % grid_w, cell // grid_w)] = STREAM_FOODS[t]
+        pos += 5
+    n_tiles, = struct.unpack_from('>H', data, pos)
+    pos += 2
+    cells = struct.unpack_from('>%dI' % n_tiles, data, pos)
+    pos += 4 * n_tiles
+    return foods, {(c % grid_w, c // grid_w) for c in cells}, pos
+
+
+def _step_dir(a, b, grid_w, grid_h):
+    dx = (b[0] - a[0]) % grid_w
+    dy = (b[1] - a[1]) % grid_h
+    if dy == 0:
+        return 3 if dx == 1 else 2
+    return 1 if dy == 1 else 0
+
+
+def encode_keyframe(seq, engine):
+    w, h = engine.grid_w, engine.grid_h
+    out = bytearray(STREAM_HEADER.pack(STREAM_MAGIC, STREAM_KEYFRAME, seq, engine.tick_count))
+    _pack_status(out, engine.state, engine.score, engine.wave_number,
+                 engine.hunger_limit - engine.hunger_timer, engine.speed)
+    snake = engine.snake
+    hx, hy = snake[0]
+    out += struct.pack('>HHII', w, h, hy * w + hx, len(snake))
+    # corpo: direcao de cada segmento para o proximo, 4 por byte
+    packed = 0
+    nbits = 0
+    prev = snake[0]
+    for i in range(1, len(snake)):
+        seg = snake[i]
+        packed |= _step_dir(prev, seg, w, h) << nbits
+        nbits += 2
+        if nbits == 8:
+            out.append(packed)
+            packed = nbits = 0
+        prev = seg
+    if nbits:
+        out.append(packed)
+    _pack_board_items(out, w, [(f['pos'], f['type']) for f in engine.foods],
+                      [t for obs in engine.obstacles for t in obs])
+    return bytes(out)
+
+
+def encode_delta(seq, engine, events):
+    """Delta com os eventos do engine desde o ultimo envio (sem 'reset': isso pede keyframe)."""
+    out = bytearray(STREAM_HEADER.pack(STREAM_MAGIC, STREAM_DELTA, seq, engine.tick_count))
+    _pack_status(out, engine.state, engine.score, engine.wave_number,
+                 engine.hunger_limit - engine.hunger_timer, engine.speed)
+    body = bytearray()
+    n = 0
+    for ev in events:
+        kind = ev[0]
+        if kind == 'head':
+            body.append(EV_HEAD)
+            body.append(_DIR_INDEX[ev[2]])
+        elif kind == 'tail':
+            body.append(EV_TAIL)
+        elif kind == 'eat':
+            body.append(EV_EAT)
+        elif kind == 'wave':
+            body.append(EV_WAVE)
+            _pack_board_items(body, engine.grid_w, ev[2], ev[3])
+        else:
+            continue
+        n += 1
+    out += struct.pack('>H', n)
+    out += body
+    return bytes(out)
+
+
+def decode_stream(data):
+    """Retorna dict com kind ('key'/'delta'), seq, tick, status e o conteudo do pacote."""
+    if len(data) < STREAM_HEADER.size + STREAM_STATUS.size or data[0] != STREAM_MAGIC:
+        raise ProtocolError('pacote de estado invalido')
+    try:
+        magic, kind, seq, tick = STREAM_HEADER.unpack_from(data)
+        pos = STREAM_HEADER.size
+        state, score, wave, hunger, speed2 = STREAM_STATUS.unpack_from(data, pos)
+        pos += STREAM_STATUS.size
+        pkt = {'seq': seq, 'tick': tick, 'state': STREAM_STATES[state], 'score': score,
+               'wave_number': wave, 'hunger_left': hunger, 'speed': speed2 / 2.0}
+        if kind == STREAM_KEYFRAME:
+            w, h, head, length = struct.unpack_from('>HHII', data, pos)
+            pos += 12
+            x, y = head % w, head // w
+            snake = [(x, y)]
+            nbytes = (length - 1 + 3) // 4
+            for i in range(length - 1):
+                d = (data[pos + i // 4] >> (2 * (i % 4))) & 3
+                dx, dy = STREAM_DIRS[d]
+                x, y = (x + dx) % w, (y + dy) % h
+                snake.append((x, y))
+            pos += nbytes
+            foods, obstacles, pos = unpack_board_items(data, pos, w)
+            pkt.update(kind='key', grid_w=w, grid_h=h, snake=snake, foods=foods, obstacles=obstacles)
+        elif kind == STREAM_DELTA:
+            n, = struct.unpack_from('>H', data, pos)
+            pos += 2
+            pkt.update(kind='delta', events=data[pos:], n_events=n)
+        else:
+            raise ProtocolError('tipo desconhecido: %d' % kind)
+        return pkt
+    except (struct.error, IndexError) as e:
+        raise ProtocolError('pacote de estado truncado: %s' % e)
@@ -0,0 +1,170 @@
+import os
+import time
+from collections import OrderedDict
+
+import pygame
+
+
+class LayerCache:
+    """
+    Guarda superficies pre-renderizadas (fundo, obstaculos, overlays) por nome.
+    Cada camada e reconstruida quando a chave muda (ex.: tamanho da tela) ou
+    quando e invalidada explicitamente.
+    """
+
+    def __init__(self):
+        self._layers = {}
+        self.builds = 0
+
+    def get(self, name, key, build):
+        entry = self._layers.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key, build())
+            self._layers[name] = entry
+            self.builds += 1
+        return entry[1]
+
+    def invalidate(self, name=None):
+        if name is None:
+            self._layers.clear()
+        else:
+            self._layers.pop(name, None)
+
+
+class FontLoader:
+    """
+    Fontes abertas so no primeiro uso, uma por tamanho. O arquivo da fonte e
+    resolvido uma vez: o primeiro de `candidates` que existir ou a fonte do
+    sistema `sysfont`. O resultado fica gravado em cache_path para que as
+    proximas execucoes nao varram as fontes do sistema (SysFont/match_font
+    chama fc-list, lento num boot a frio).
+    """
+
+    def __init__(self, candidates=(), sysfont='dejavusansmono', cache_path=None):
+        self.candidates = candidates
+        self.sysfont = sysfont
+        self.cache_path = cache_path
+        self._path = False   # False = ainda nao resolvido; None = fonte padrao do pygame
+        self._fonts = {}
+        self.resolve_seconds = 0.0
+
+    def path(self):
+        if self._path is False:
+            t0 = time.perf_counter()
+            self._path = self._resolve()
+            self.resolve_seconds = time.perf_counter() - t0
+        return self._path
+
+    def _resolve(self):
+        for path in self.candidates:
+            if os.path.exists(path):
+                return path
+        cached = self._read_cache()
+        if cached is not None:
+            return cached
+        try:
+            path = pygame.font.match_font(self.sysfont)
+        except Exception:
+            path = None
+        if path and self.cache_path:
+            try:
+                with open(self.cache_path, 'w') as f:
+                    f.write('%s\t%s\n' % (self.sysfont, path))
+            except OSError:
+                pass
+        return path
+
+    def _read_cache(self):
+        if not self.cache_path:
+            return None
+        try:
+            with open(self.cache_path) as f:
+                name, path = f.read().rstrip('\n').split('\t')
+        except (OSError, ValueError):
+            return None
+        return path if name == self.sysfont and os.path.exists(path) else None
+
+    def get(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            try:
+                font = pygame.font.Font(self.path(), size)
+            except Exception:
+                font = pygame.font.Font(None, size)
+            self._fonts[size] = font
+        return font
+
+
+class TextCache:
+    """
+    Cache LRU de textos renderizados, chave (font, text, color).
+    hits/misses mostram se os frames estaveis ainda rasterizam glifos.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, False, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def __len__(self):
+        return len(self._surfaces)
+
+
+class ChunkIndex:
+    """
+    Indice espacial das celulas ocupadas (cobra, comida, obstaculo) em blocos
+    de chunk x chunk tiles. O engine chama update() a cada mudanca de celula
+    (engine.chunks); query() devolve so as celulas dos blocos que cruzam uma
+    janela, entao o custo depende do tamanho da janela, nao do mundo.
+    """
+
+    def __init__(self, grid_w, grid_h, chunk=16):
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self.chunk = chunk
+        self.chunks_w = (grid_w + chunk - 1) // chunk
+        self.chunks_h = (grid_h + chunk - 1) // chunk
+        self._chunks = [set() for _ in range(self.chunks_w * self.chunks_h)]
+
+    def _chunk_of(self, idx):
+        y, x = divmod(idx, self.grid_w)
+        return (y // self.chunk) * self.chunks_w + x // self.chunk
+
+    def update(self, idx, code):
+        if code:
+            self._chunks[self._chunk_of(idx)].add(idx)
+        else:
+            self._chunks[self._chunk_of(idx)].discard(idx)
+
+    def clear(self):
+        for c in self._chunks:
+            c.clear()
+
+    def query(self, x0, y0, cols, rows):
+        """Celulas ocupadas nos blocos que cruzam a janela (x0, y0, cols, rows); a janela da a volta no mundo."""
+        c = self.chunk
+        xs = {((x0 + i) % self.grid_w) // c for i in range(cols)}
+        ys = {((y0 + i) % self.grid_h) // c for i in range(rows)}
+        chunks = self._chunks
+        for cy in ys:
+            row = cy * self.chunks_w
+            for cx in xs:
+                yield from chunks[row + cx]
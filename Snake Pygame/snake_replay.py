@@ -0,0 +1,177 @@
+import glob
+import os
+import random
+import struct
+import sys
+import time
+
+from snake_engine import SnakeEngine, canonical_command
+
+# --- formato binario (little-endian)
+#  cabecalho: 'SNKR', versao u8, seed u64, grid_w u16, grid_h u16, n_registros u32
+#  registros: delta de tick (varint) + opcode u8
+#  rodape:    tick final u32, hash do estado (8 bytes)
+REPLAY_MAGIC = b'SNKR'
+REPLAY_VERSION = 2
+# regras do engine de cada versao gravada (v1: antes da fila de giros)
+REPLAY_RULES = {1: {'turn_buffer': 0}, 2: {}}
+HEADER = struct.Struct('<4sBQHHI')
+FOOTER = struct.Struct('<I8s')
+
+REPLAY_OPCODES = {'UP': 1, 'DOWN': 2, 'LEFT': 3, 'RIGHT': 4, 'PAUSE': 5}
+REPLAY_COMMANDS = {op: cmd for cmd, op in REPLAY_OPCODES.items()}
+
+
+class ReplayError(Exception):
+    pass
+
+
+def _write_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data, pos):
+    n = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError('replay truncado')
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def encode_replay(seed, grid_w, grid_h, records, final_tick, final_hash):
+    out = bytearray(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, seed, grid_w, grid_h, len(records)))
+    last_tick = 0
+    for tick, op in records:
+        _write_varint(out, tick - last_tick)
+        out.append(op)
+        last_tick = tick
+    out += FOOTER.pack(final_tick, final_hash)
+    return bytes(out)
+
+
+def decode_replay(data):
+    """Retorna dict com seed, grid_w, grid_h, records [(tick, opcode)], final_tick e final_hash."""
+    if len(data) < HEADER.size + FOOTER.size:
+        raise ReplayError('replay truncado')
+    magic, version, seed, grid_w, grid_h, n_records = HEADER.unpack_from(data, 0)
+    if magic != REPLAY_MAGIC:
+        raise ReplayError('nao e um replay')
+    if version not in REPLAY_RULES:
+        raise ReplayError('versao de replay desconhecida: %d' % version)
+    pos = HEADER.size
+    tick = 0
+    records = []
+    for _ in range(n_records):
+        delta, pos = _read_varint(data, pos)
+        tick += delta
+        if pos >= len(data):
+            raise ReplayError('replay truncado')
+        records.append((tick, data[pos]))
+        pos += 1
+    final_tick, final_hash = FOOTER.unpack_from(data, pos)
+    return {'version': version, 'seed': seed, 'grid_w': grid_w, 'grid_h': grid_h, 'records': records,
+            'final_tick': final_tick, 'final_hash': final_hash}
+
+
+class ReplayRecorder:
+    """
+    Liga-se ao engine (engine.recorder = ReplayRecorder()) e grava, para cada
+    partida, a seed e os comandos aplicados com o tick em que chegaram.
+    Ao fim da partida o replay fica em self.last_replay (bytes).
+    """
+
+    def __init__(self, on_replay=None):
+        self.on_replay = on_replay
+        self.records = []
+        self.last_replay = None
+
+    def begin(self, engine):
+        self.records = []
+
+    def record(self, engine, cmd):
+        op = REPLAY_OPCODES.get(canonical_command(cmd))
+        # PAUSE no menu nao faz nada; no replay (que ja comeca jogando) pausaria
+        if op is not None and not (engine.state == 'menu' and op == REPLAY_OPCODES['PAUSE']):
+            self.records.append((engine.tick_count, op))
+
+    def finish(self, engine):
+        self.last_replay = encode_replay(engine.game_seed, engine.grid_w, engine.grid_h,
+                                         self.records, engine.tick_count, engine.state_hash())
+        if self.on_replay is not None:
+            self.on_replay(self.last_replay)
+
+
+def play_replay(data):
+    """
+    Reproduz um replay headless, o mais rapido possivel.
+    Retorna (engine, ok) onde ok diz se o hash final confere.
+    """
+    rep = decode_replay(data)
+    engine = SnakeEngine(rep['grid_w'], rep['grid_h'], rules=REPLAY_RULES[rep['version']])
+    engine.start_new_game(seed=rep['seed'])
+    for tick, op in rep['records']:
+        while engine.tick_count < tick and engine.state != 'gameover':
+            if engine.state != 'playing':
+                raise ReplayError('replay parado em %s no tick %d' % (engine.state, engine.tick_count))
+            engine.tick()
+        engine.process_input_cmd('replay', REPLAY_COMMANDS[op])
+    while engine.tick_count < rep['final_tick'] and engine.state == 'playing':
+        engine.tick()
+    ok = engine.tick_count == rep['final_tick'] and engine.state_hash() == rep['final_hash']
+    return engine, ok
+
+
+def record_random_games(n_games, seed=0):
+    """Gera n_games replays com um jogador aleatorio (para testes de regressao)."""
+    bot = random.Random(seed)
+    engine = SnakeEngine(seed=seed)
+    engine.recorder = ReplayRecorder()
+    replays = []
+    for _ in range(n_games):
+        engine.start_new_game()
+        while engine.state == 'playing':
+            if bot.random() < 0.3:
+                engine.process_input_cmd('bot', bot.choice(['UP', 'DOWN', 'LEFT', 'RIGHT']))
+            engine.tick()
+        replays.append(engine.recorder.last_replay)
+    return replays
+
+
+if __name__ == '__main__':
+    # python snake_replay.py --generate N pasta   |   python snake_replay.py arquivos_ou_pastas...
+    args = sys.argv[1:]
+    if len(args) == 3 and args[0] == '--generate':
+        os.makedirs(args[2], exist_ok=True)
+        for i, data in enumerate(record_random_games(int(args[1]))):
+            with open(os.path.join(args[2], 'game_%05d.snkr' % i), 'wb') as f:
+                f.write(data)
+        sys.exit(0)
+
+    paths = []
+    for a in args:
+        paths += sorted(glob.glob(os.path.join(a, '*.snkr'))) if os.path.isdir(a) else [a]
+    t0 = time.perf_counter()
+    failed = 0
+    ticks = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            try:
+                engine, ok = play_replay(f.read())
+                ticks += engine.tick_count
+            except ReplayError as e:
+                ok = False
+                print(path, e)
+        if not ok:
+            failed += 1
+            print('DIVERGIU:', path)
+    elapsed = time.perf_counter() - t0
+    print('%d replays, %d divergentes, %d ticks em %.2fs' % (len(paths), failed, ticks, elapsed))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,401 @@
+import heapq
+import multiprocessing
+import os
+import queue
+import selectors
+import socket
+import sys
+import time
+
+from snake_engine import SnakeEngine, GRID_W, GRID_H, MAX_CATCHUP_TICKS
+from snake_perf import LatencyHistogram
+from snake_protocol import (is_binary_packet, decode_control, ProtocolError, SequenceFilter,
+                            SUBSCRIBE, KEYFRAME_REQUEST)
+from snake_spectate import StreamPublisher, send_to_all, SPECTATOR_PORT, SUBSCRIBER_TIMEOUT
+
+# --- CONFIG
+CONTROL_PORT = 5005
+# sessao sem pacote do controle por esse tempo e encerrada
+SESSION_IDLE_TIMEOUT = 120.0
+# frequencia dos frames enviados aos espectadores (so sessoes assistidas)
+SPECTATOR_FPS = 30
+# workers mandam estatisticas ao processo principal nesse intervalo
+STATS_INTERVAL = 1.0
+STATS_PRINT_INTERVAL = 5.0
+UDP_RECV_SIZE = 2048
+
+
+# --- lado do worker: varias sessoes headless num processo
+class Session:
+    def __init__(self, sid, seed):
+        self.sid = sid
+        self.engine = SnakeEngine(GRID_W, GRID_H, initial_menu=True, seed=seed)
+        self.due = None           # proximo tick (perf_counter) ou None se parada
+        self.tick_time = LatencyHistogram()   # duracao de cada tick()
+        self.tick_late = LatencyHistogram()   # atraso do tick em relacao ao agendado
+        self.watchers = ()
+        self.stream = None
+
+
+class SessionShard:
+    """
+    As sessoes de um worker e o agendador delas. Cada sessao anda no proprio
+    ritmo (move_delay = 1/speed): um heap (due, sid) diz quem e o proximo;
+    sessoes fora de 'playing' saem do heap e voltam quando um comando as
+    coloca em jogo. Entradas velhas do heap sao descartadas ao sair (due
+    diferente do da sessao).
+    """
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.sessions = {}
+        self._heap = []
+        self._send_sock = None
+
+    # --- mensagens do processo principal
+    def handle(self, msg, now):
+        kind, sid = msg[0], msg[1]
+        if kind == 'open':
+            self.sessions[sid] = Session(sid, msg[2])
+            return
+        sess = self.sessions.get(sid)
+        if sess is None:
+            return
+        if kind == 'cmds':
+            engine = sess.engine
+            for cmd in msg[2]:
+                engine.process_input_cmd('udp', cmd)
+            self._schedule(sess, now)
+        elif kind == 'close':
+            del self.sessions[sid]
+        elif kind == 'watch':
+            sess.watchers = msg[2]
+            if sess.watchers and sess.stream is None:
+                sess.stream = StreamPublisher()
+                sess.engine.events = []
+            elif not sess.watchers:
+                sess.stream = None
+                sess.engine.events = None
+        elif kind == 'key' and sess.stream is not None:
+            sess.stream.need_keyframe = True
+
+    def _schedule(self, sess, now):
+        if sess.engine.state == 'playing' and sess.due is None:
+            sess.due = now + sess.engine.move_delay
+            heapq.heappush(self._heap, (sess.due, sess.sid))
+
+    def next_due(self):
+        heap = self._heap
+        while heap:
+            due, sid = heap[0]
+            sess = self.sessions.get(sid)
+            if sess is not None and sess.due == due:
+                return due
+            heapq.heappop(heap)
+        return None
+
+    def run_due(self, now):
+        """Roda os ticks vencidos; retorna quantos."""
+        heap = self._heap
+        n = 0
+        while heap and heap[0][0] <= now:
+            due, sid = heapq.heappop(heap)
+            sess = self.sessions.get(sid)
+            if sess is None or sess.due != due:
+                continue
+            engine = sess.engine
+            if engine.state != 'playing':
+                sess.due = None
+                continue
+            t0 = time.perf_counter()
+            engine.tick()
+            t1 = time.perf_counter()
+            sess.tick_time.add(t1 - t0)
+            sess.tick_late.add(max(0.0, t0 - due))
+            n += 1
+            if engine.state != 'playing':
+                sess.due = None
+                continue
+            due += engine.move_delay
+            # atrasou demais (processo parado, maquina lotada): descarta o atraso
+            if now - due > MAX_CATCHUP_TICKS * engine.move_delay:
+                due = now + engine.move_delay
+            sess.due = due
+            heapq.heappush(heap, (due, sid))
+        return n
+
+    def publish(self, now):
+        for sess in self.sessions.values():
+            if sess.stream is None:
+                continue
+            data = sess.stream.packet(sess.engine, sess.engine.events, now)
+            sess.engine.events.clear()
+            if data is not None:
+                if self._send_sock is None:
+                    self._send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                send_to_all(self._send_sock, data, sess.watchers)
+
+    def stats(self):
+        """{sid: (state, score, ticks, p50, p95, max do tick, p95 do atraso)}; zera os histogramas."""
+        out = {}
+        for sid, sess in self.sessions.items():
+            h = sess.tick_time
+            state = 'exit' if sess.engine.exit_requested else sess.engine.state
+            out[sid] = (state, sess.engine.score, h.count, h.percentile(50),
+                        h.percentile(95), h.max, sess.tick_late.percentile(95))
+            sess.tick_time = LatencyHistogram()
+            sess.tick_late = LatencyHistogram()
+        return out
+
+
+def worker_main(worker_id, inbox, outbox):
+    shard = SessionShard(worker_id)
+    frame_interval = 1.0 / SPECTATOR_FPS
+    next_frame = next_stats = time.perf_counter()
+    while True:
+        now = time.perf_counter()
+        deadline = min(next_frame, next_stats)
+        due = shard.next_due()
+        if due is not None:
+            deadline = min(deadline, due)
+        try:
+            msg = inbox.get(timeout=max(0.0, deadline - now))
+            while True:
+                if msg[0] == 'stop':
+                    return
+                shard.handle(msg, time.perf_counter())
+                msg = inbox.get_nowait()
+        except queue.Empty:
+            pass
+
+        now = time.perf_counter()
+        shard.run_due(now)
+        if now >= next_frame:
+            shard.publish(now)
+            next_frame = now + frame_interval
+        if now >= next_stats:
+            outbox.put(('stats', worker_id, shard.stats()))
+            next_stats = now + STATS_INTERVAL
+
+
+# --- processo principal: sockets, roteamento e sharding
+class GameServer:
+    """
+    Servidor de varias partidas: cada endereco que manda comandos para
+    CONTROL_PORT ganha uma sessao headless propria, distribuida no worker
+    com menos sessoes. Espectadores mandam 'HELLO <sessao>' para
+    SPECTATOR_PORT; so as sessoes assistidas geram eventos e frames.
+    """
+
+    def __init__(self, n_workers=None, host='0.0.0.0', control_port=CONTROL_PORT,
+                 spectator_port=SPECTATOR_PORT, verbose=True):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.host = host
+        self.control_port = control_port
+        self.spectator_port = spectator_port
+        self.verbose = verbose
+        self.sessions = {}        # sid -> [worker, addr, ultimo pacote]
+        self.by_addr = {}         # addr -> sid
+        self.watchers = {}        # sid -> {addr: ultimo HELLO}
+        self.load = [0] * self.n_workers
+        self.stats = {}           # sid -> ultima estatistica do worker
+        self.seq_filter = SequenceFilter()
+        self.udp_malformed = 0
+        self._next_sid = 1
+        self._running = False
+
+    def start(self):
+        ctx = multiprocessing.get_context()
+        self.outbox = ctx.Queue()
+        self.inboxes = [ctx.Queue() for _ in range(self.n_workers)]
+        self.workers = [ctx.Process(target=worker_main, args=(i, self.inboxes[i], self.outbox), daemon=True)
+                        for i in range(self.n_workers)]
+        for w in self.workers:
+            w.start()
+        self.sel = selectors.DefaultSelector()
+        self.control_sock = self._bind(self.control_port, self._read_control)
+        self.spectator_sock = self._bind(self.spectator_port, self._read_spectators)
+        self._running = True
+
+    def _bind(self, port, callback):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind((self.host, port))
+        s.setblocking(False)
+        self.sel.register(s, selectors.EVENT_READ, callback)
+        return s
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        for q in self.inboxes:
+            q.put(('stop', None))
+        for w in self.workers:
+            w.join(timeout=2.0)
+            if w.is_alive():
+                w.terminate()
+        self.sel.close()
+        self.control_sock.close()
+        self.spectator_sock.close()
+
+    # --- sessoes
+    def _open_session(self, addr, now):
+        sid = self._next_sid
+        self._next_sid += 1
+        worker = self.load.index(min(self.load))
+        self.load[worker] += 1
+        self.sessions[sid] = [worker, addr, now]
+        self.by_addr[addr] = sid
+        self.inboxes[worker].put(('open', sid, int.from_bytes(os.urandom(8), 'little') >> 1))
+        if self.verbose:
+            print('sessao %d aberta para %s:%d (worker %d)' % (sid, addr[0], addr[1], worker))
+        return sid
+
+    def _close_session(self, sid):
+        worker, addr, _ = self.sessions.pop(sid)
+        del self.by_addr[addr]
+        self.load[worker] -= 1
+        self.watchers.pop(sid, None)
+        self.stats.pop(sid, None)
+        self.inboxes[worker].put(('close', sid))
+        if self.verbose:
+            print('sessao %d encerrada' % sid)
+
+    # --- leitura
+    def _read_control(self, sock, now):
+        batches = {}
+        while True:
+            try:
+                data, addr = sock.recvfrom(UDP_RECV_SIZE)
+            except (BlockingIOError, InterruptedError):
+                break
+            except ConnectionResetError:
+                continue
+            if is_binary_packet(data):
+                try:
+                    flags, seq, cmds = decode_control(data)
+                except ProtocolError:
+                    self.udp_malformed += 1
+                    continue
+                if not self.seq_filter.accept(addr, seq, flags, now):
+                    continue
+            else:
+                cmd = data.decode('utf-8', errors='ignore').strip().upper()
+                cmds = [cmd] if cmd else []
+            if not cmds:
+                continue
+            sid = self.by_addr.get(addr)
+            if sid is None:
+                sid = self._open_session(addr, now)
+            self.sessions[sid][2] = now
+            batches.setdefault(sid, []).extend(cmds)
+        # um put por sessao por acordada
+        for sid, cmds in batches.items():
+            self.inboxes[self.sessions[sid][0]].put(('cmds', sid, cmds))
+
+    def _read_spectators(self, sock, now):
+        changed = set()
+        while True:
+            try:
+                data, addr = sock.recvfrom(64)
+            except (BlockingIOError, InterruptedError):
+                break
+            except ConnectionResetError:
+                continue
+            msg = data.strip()
+            if msg.startswith(SUBSCRIBE):
+                sid = self._pick_session(msg[len(SUBSCRIBE):].strip())
+                if sid is None:
+                    continue
+                for other, subs in self.watchers.items():
+                    if other != sid and subs.pop(addr, None) is not None:
+                        changed.add(other)
+                subs = self.watchers.setdefault(sid, {})
+                if addr not in subs:
+                    changed.add(sid)
+                subs[addr] = now
+            elif msg == KEYFRAME_REQUEST:
+                for sid, subs in self.watchers.items():
+                    if addr in subs:
+                        self.inboxes[self.sessions[sid][0]].put(('key', sid))
+        for sid in changed:
+            self._send_watchers(sid)
+
+    def _pick_session(self, arg):
+        """'HELLO 3' assiste a sessao 3; 'HELLO' assiste a mais antiga."""
+        if arg:
+            try:
+                sid = int(arg)
+            except ValueError:
+                return None
+            return sid if sid in self.sessions else None
+        return min(self.sessions) if self.sessions else None
+
+    def _send_watchers(self, sid):
+        if sid not in self.sessions:
+            return
+        subs = self.watchers.get(sid) or {}
+        self.inboxes[self.sessions[sid][0]].put(('watch', sid, tuple(subs)))
+
+    # --- manutencao
+    def _expire(self, now):
+        for sid in [s for s, info in self.sessions.items() if now - info[2] > SESSION_IDLE_TIMEOUT]:
+            self._close_session(sid)
+        for sid, subs in list(self.watchers.items()):
+            old = [a for a, t in subs.items() if now - t > SUBSCRIBER_TIMEOUT]
+            for addr in old:
+                del subs[addr]
+            if old:
+                self._send_watchers(sid)
+            if not subs:
+                del self.watchers[sid]
+
+    def _drain_stats(self):
+        try:
+            while True:
+                kind, worker, stats = self.outbox.get_nowait()
+                for sid, row in stats.items():
+                    if sid in self.sessions:
+                        self.stats[sid] = row
+        except queue.Empty:
+            pass
+        # sessoes encerradas pelo proprio jogador (SAIR no gameover)
+        for sid in [s for s, row in self.stats.items() if row[0] == 'exit']:
+            self._close_session(sid)
+
+    def summary_lines(self):
+        lines = ['%d sessoes em %d workers %s' % (len(self.sessions), self.n_workers, self.load)]
+        for sid in sorted(self.stats):
+            state, score, ticks, p50, p95, mx, late95 = self.stats[sid]
+            lines.append('  #%-4d w%-2d %-8s score %-4d %3d ticks/s  tick p50 %5.1fus p95 %5.1fus max %6.1fus  atraso p95 %5.1fms'
+                         % (sid, self.sessions[sid][0], state, score, ticks / STATS_INTERVAL,
+                            p50 * 1e6, p95 * 1e6, mx * 1e6, late95 * 1000))
+        return lines
+
+    def serve_forever(self):
+        self.start()
+        if self.verbose:
+            print('servidor: controle na porta %d, espectadores na %d, %d workers'
+                  % (self.control_port, self.spectator_port, self.n_workers))
+        next_print = time.perf_counter() + STATS_PRINT_INTERVAL
+        try:
+            while True:
+                for key, mask in self.sel.select(0.25):
+                    key.data(key.fileobj, time.perf_counter())
+                now = time.perf_counter()
+                self._drain_stats()
+                self._expire(now)
+                if self.verbose and now >= next_print:
+                    print('\n'.join(self.summary_lines()))
+                    next_print = now + STATS_PRINT_INTERVAL
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+if __name__ == '__main__':
+    # python snake_server.py [n_workers]
+    args = sys.argv[1:]
+    GameServer(n_workers=int(args[0]) if args else None).serve_forever()
@@ -0,0 +1,205 @@
+import socket
+import time
+from collections import deque
+
+from snake_protocol import (encode_keyframe, encode_delta, decode_stream, ProtocolError,
+                            STREAM_DIRS, EV_HEAD, EV_TAIL, EV_EAT, EV_WAVE,
+                            SUBSCRIBE, KEYFRAME_REQUEST, unpack_board_items)
+
+SPECTATOR_PORT = 5006
+# viewer que nao renova a inscricao (HELLO) nesse tempo deixa de receber
+SUBSCRIBER_TIMEOUT = 10.0
+# keyframe periodico: quem perdeu pacote se recupera sem pedir
+KEYFRAME_INTERVAL = 2.0
+MAX_DATAGRAM = 1400
+
+
+class StreamPublisher:
+    """
+    Decide o que mandar a cada frame para os espectadores de uma partida:
+    um delta so com o que mudou (cabeca, cauda, comida, wave) ou um keyframe
+    com o tabuleiro inteiro quando a partida recomeca, quando pedem
+    (need_keyframe) ou a cada keyframe_interval. Nao mexe em socket.
+    """
+
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self.keyframes_sent = 0
+        self.deltas_sent = 0
+        self.need_keyframe = True
+        self._last_keyframe = 0.0
+        self._last_status = None
+
+    def packet(self, engine, events, now):
+        """Bytes a transmitir neste frame, ou None se nada mudou."""
+        status = (engine.state, engine.score, engine.wave_number, int(engine.hunger_timer), engine.speed)
+        if any(ev[0] == 'reset' for ev in events):
+            self.need_keyframe = True
+        if self.need_keyframe or now - self._last_keyframe >= self.keyframe_interval:
+            data = self._keyframe(engine, now)
+        elif events or status != self._last_status:
+            data = encode_delta(self.seq, engine, events)
+            if len(data) > MAX_DATAGRAM:
+                data = self._keyframe(engine, now)
+            else:
+                self.deltas_sent += 1
+        else:
+            return None
+        self._last_status = status
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        return data
+
+    def _keyframe(self, engine, now):
+        self.need_keyframe = False
+        self._last_keyframe = now
+        self.keyframes_sent += 1
+        return encode_keyframe(self.seq, engine)
+
+
+class SpectatorServer:
+    """
+    Transmite a partida por UDP para espectadores.
+
+    O engine acumula eventos (engine.events = []) e publish() e chamado uma vez
+    por frame; o StreamPublisher escolhe entre delta e keyframe. O socket e nao
+    bloqueante e nunca segura o loop do jogo; erros de envio sao ignorados.
+    """
+
+    def __init__(self, host='0.0.0.0', port=SPECTATOR_PORT, keyframe_interval=KEYFRAME_INTERVAL):
+        self.subscribers = {}   # addr -> ultimo HELLO
+        self.bytes_sent = 0
+        self.stream = StreamPublisher(keyframe_interval)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.setblocking(False)
+
+    def _poll_subscribers(self, now):
+        while True:
+            try:
+                data, addr = self._sock.recvfrom(64)
+            except (BlockingIOError, InterruptedError):
+                break
+            except ConnectionResetError:
+                continue
+            except OSError:
+                break
+            msg = data.strip()
+            if msg.startswith(SUBSCRIBE):
+                if addr not in self.subscribers:
+                    self.stream.need_keyframe = True
+                self.subscribers[addr] = now
+            elif msg == KEYFRAME_REQUEST and addr in self.subscribers:
+                self.stream.need_keyframe = True
+        for addr in [a for a, t in self.subscribers.items() if now - t > SUBSCRIBER_TIMEOUT]:
+            del self.subscribers[addr]
+
+    def publish(self, engine, events):
+        now = time.perf_counter()
+        self._poll_subscribers(now)
+        if not self.subscribers:
+            self.stream.need_keyframe = True
+            return
+        data = self.stream.packet(engine, events, now)
+        if data is not None:
+            self.bytes_sent += send_to_all(self._sock, data, self.subscribers)
+
+    def close(self):
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+
+def send_to_all(sock, data, addrs):
+    """Envia para cada endereco ignorando erros; retorna os bytes enviados."""
+    sent = 0
+    for addr in addrs:
+        try:
+            sock.sendto(data, addr)
+            sent += len(data)
+        except OSError:
+            pass
+    return sent
+
+
+class BoardMirror:
+    """
+    Copia do tabuleiro do lado do espectador: aplica keyframes e deltas.
+    Se um delta chega fora de sequencia o espelho fica invalido (synced = False)
+    ate o proximo keyframe; apply() retorna True quando deve pedir um (KEY).
+    """
+
+    def __init__(self):
+        self.synced = False
+        self.seq = None
+        self.tick = 0
+        self.grid_w = self.grid_h = 0
+        self.snake = deque()
+        self.foods = {}
+        self.obstacles = set()
+        self.state = 'menu'
+        self.score = 0
+        self.wave_number = 0
+        self.hunger_left = 0
+        self.speed = 0.0
+        self.gaps = 0
+
+    def apply(self, data):
+        try:
+            pkt = decode_stream(data)
+        except ProtocolError:
+            return not self.synced
+        if pkt['kind'] == 'key':
+            self.grid_w, self.grid_h = pkt['grid_w'], pkt['grid_h']
+            self.snake = deque(pkt['snake'])
+            self.foods = pkt['foods']
+            self.obstacles = pkt['obstacles']
+            self.synced = True
+        else:
+            if not self.synced:
+                return True
+            if pkt['seq'] != (self.seq + 1) & 0xFFFFFFFF:
+                if ((pkt['seq'] - self.seq) & 0xFFFFFFFF) >= 0x80000000:
+                    return False   # atrasado: descarta
+                self.synced = False
+                self.gaps += 1
+                return True
+            try:
+                self._apply_events(pkt['events'], pkt['n_events'])
+            except (ProtocolError, IndexError):
+                self.synced = False
+                return True
+        self.seq = pkt['seq']
+        self.tick = pkt['tick']
+        for key in ('state', 'score', 'wave_number', 'hunger_left', 'speed'):
+            setattr(self, key, pkt[key])
+        return False
+
+    def _apply_events(self, data, n):
+        pos = 0
+        w, h = self.grid_w, self.grid_h
+        for _ in range(n):
+            kind = data[pos]
+            pos += 1
+            if kind == EV_HEAD:
+                dx, dy = STREAM_DIRS[data[pos]]
+                pos += 1
+                hx, hy = self.snake[0]
+                self.snake.appendleft(((hx + dx) % w, (hy + dy) % h))
+            elif kind == EV_TAIL:
+                self.snake.pop()
+            elif kind == EV_EAT:
+                self.foods.pop(self.snake[0], None)
+            elif kind == EV_WAVE:
+                self.foods, self.obstacles, pos = unpack_board_items(data, pos, w)
+            else:
+                raise ProtocolError('evento desconhecido: %d' % kind)
+
+
+def board_of(engine):
+    """O mesmo que um BoardMirror sincronizado guardaria (para conferir o espelho)."""
+    return (list(engine.snake), {f['pos']: f['type'] for f in engine.foods},
+            {t for obs in engine.obstacles for t in obs})
+
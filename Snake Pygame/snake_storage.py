@@ -0,0 +1,209 @@
+import heapq
+import os
+import stat
+import tempfile
+import threading
+import time
+
+BEST_SCORE_FILE = 'best_score.txt'
+SCORE_HISTORY_FILE = 'score_history.csv'
+
+FLUSH_INTERVAL = 2.0
+TOP_KEEP = 100
+
+# lida uma vez no import: os.umask so le trocando, e a escrita roda numa thread
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def load_best_score(path=BEST_SCORE_FILE):
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return int(f.read().strip())
+    except Exception:
+        pass
+    return 0
+
+
+def _file_mode(path):
+    """Permissoes de path, ou as de um arquivo novo (0666 menos a umask) se ainda nao existe."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+def atomic_write(path, data):
+    """Escreve num arquivo temporario na mesma pasta e troca com os.replace (nunca deixa o arquivo truncado)."""
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix='.tmp_', suffix='.txt')
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(data, bytes) else 'w') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp cria com 0600; o arquivo final fica com as permissoes de sempre
+        os.chmod(tmp, _file_mode(path))
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def prune_files(path, keep):
+    """Apaga os arquivos mais velhos (por mtime) da pasta de path com a mesma extensao, deixando keep."""
+    folder = os.path.dirname(path) or '.'
+    ext = os.path.splitext(path)[1]
+    try:
+        names = [os.path.join(folder, n) for n in os.listdir(folder) if n.endswith(ext)]
+        names.sort(key=os.path.getmtime)
+    except OSError:
+        return
+    for old in names[:-keep]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+
+class ScoreStore:
+    """
+    Recorde e historico de partidas com escrita em segundo plano.
+
+    submit_best() e record_game() so guardam o valor na memoria; uma thread
+    grava a cada FLUSH_INTERVAL (ou no flush/close), juntando varias
+    atualizacoes do recorde numa unica escrita atomica. O historico e um
+    CSV so de acrescimo: timestamp,score,wave,length,cause.
+    """
+
+    def __init__(self, best_path=BEST_SCORE_FILE, history_path=SCORE_HISTORY_FILE,
+                 flush_interval=FLUSH_INTERVAL, top_keep=TOP_KEEP):
+        self.best_path = best_path
+        self.history_path = history_path
+        self.flush_interval = flush_interval
+        self.top_keep = top_keep
+
+        self.best_score = load_best_score(best_path)
+        self._top = []   # min-heap (score, timestamp, row) com os top_keep melhores
+        self._load_history()
+
+        self._lock = threading.Lock()
+        self._pending_best = None
+        self._pending_rows = []
+        self._pending_files = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+    def _load_history(self):
+        try:
+            if not os.path.exists(self.history_path):
+                return
+            with open(self.history_path, 'r') as f:
+                for line in f:
+                    parts = line.strip().split(',')
+                    if len(parts) != 5:
+                        continue
+                    try:
+                        row = (float(parts[0]), int(parts[1]), int(parts[2]), int(parts[3]), parts[4])
+                    except ValueError:
+                        continue
+                    self._push_top(row)
+        except Exception:
+            pass
+
+    def _push_top(self, row):
+        item = (row[1], row[0], row)
+        if len(self._top) < self.top_keep:
+            heapq.heappush(self._top, item)
+        elif item > self._top[0]:
+            heapq.heapreplace(self._top, item)
+
+    # --- API usada pelo jogo (nao bloqueia)
+    def submit_best(self, val):
+        val = int(val)
+        if val <= self.best_score:
+            return
+        self.best_score = val
+        with self._lock:
+            self._pending_best = val
+
+    def record_game(self, score, wave, length, cause):
+        row = (time.time(), int(score), int(wave), int(length), str(cause))
+        self._push_top(row)
+        with self._lock:
+            self._pending_rows.append(row)
+
+    def write_file(self, path, data, keep=None):
+        """
+        Agenda a escrita atomica de um arquivo qualquer (ex.: replay) na thread de
+        escrita. Com keep, depois de gravar deixa na pasta so os keep arquivos
+        mais novos com a mesma extensao.
+        """
+        with self._lock:
+            self._pending_files[path] = (data, keep)
+        self._wake.set()
+
+    def top(self, n=10):
+        """As n melhores partidas (timestamp, score, wave, length, cause), maior score primeiro."""
+        return [item[2] for item in heapq.nlargest(n, self._top)]
+
+    def flush(self):
+        """
+        Grava agora o que estiver pendente (na thread de quem chamou). Cada item
+        e gravado em separado: o que falhar volta para a fila do proximo flush.
+        """
+        with self._lock:
+            best, self._pending_best = self._pending_best, None
+            rows, self._pending_rows = self._pending_rows, []
+            files, self._pending_files = self._pending_files, {}
+        if best is not None:
+            try:
+                atomic_write(self.best_path, str(best))
+            except Exception as e:
+                print('Falha ao gravar %s:' % self.best_path, e)
+                with self._lock:
+                    if self._pending_best is None or self._pending_best < best:
+                        self._pending_best = best
+        if rows:
+            try:
+                with open(self.history_path, 'a') as f:
+                    f.write(''.join('%.3f,%d,%d,%d,%s\n' % r for r in rows))
+            except Exception as e:
+                print('Falha ao gravar %s:' % self.history_path, e)
+                with self._lock:
+                    self._pending_rows[:0] = rows
+        for path, (data, keep) in files.items():
+            try:
+                folder = os.path.dirname(path)
+                if folder:
+                    os.makedirs(folder, exist_ok=True)
+                atomic_write(path, data)
+            except Exception as e:
+                print('Falha ao gravar %s:' % path, e)
+                with self._lock:
+                    # uma versao mais nova agendada nesse meio tempo vence
+                    self._pending_files.setdefault(path, (data, keep))
+                continue
+            if keep:
+                prune_files(path, keep)
+
+    def request_flush(self):
+        self._wake.set()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5.0)
+        self.flush()
+
+    def _writer(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
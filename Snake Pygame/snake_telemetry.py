@@ -0,0 +1,237 @@
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+TELEMETRY_DIR = 'telemetry'
+MAX_FILE_BYTES = 4 * 1024 * 1024
+MAX_FILES = 50   # os mais velhos sao apagados
+FLUSH_INTERVAL = 2.0
+
+
+class TelemetryLog:
+    """
+    Log estruturado dos eventos de jogo, um JSON por linha:
+      start  partida nova
+      wave   leva gerada (comidas por tipo, obstaculos e tiles de obstaculo)
+      eat    comida comida (tipo, leva)
+      speed  nova velocidade
+      death  fim de jogo (causa, leva, score, tamanho)
+    Todas as linhas tem t (time.time), game (seed da partida) e tick.
+
+    record() e chamado uma vez por frame com a lista engine.events e so
+    guarda tuplas na memoria; uma thread formata e grava em lote a cada
+    FLUSH_INTERVAL. Quando o arquivo passa de max_bytes abre o proximo
+    (events_<data>_<n>.jsonl), mantendo no maximo max_files na pasta.
+    """
+
+    def __init__(self, folder=TELEMETRY_DIR, max_bytes=MAX_FILE_BYTES, max_files=MAX_FILES,
+                 flush_interval=FLUSH_INTERVAL):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.flush_interval = flush_interval
+        self.events_written = 0
+        self.files_opened = 0
+        self._file = None
+        self._wave = None
+        self._lock = threading.Lock()
+        self._pending = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+    # --- thread do jogo
+    def record(self, engine, events):
+        t = time.time()
+        game, tick = engine.game_seed, engine.tick_count
+        rows = []
+        for ev in events:
+            kind = ev[0]
+            if kind == 'eat':
+                rows.append((t, game, tick, 'eat', {'food': ev[2], 'wave': self._wave or engine.wave_number}))
+            elif kind == 'speed':
+                rows.append((t, game, tick, 'speed', {'speed': ev[1]}))
+            elif kind == 'wave':
+                self._wave = ev[1]
+                rows.append((t, game, tick, 'wave', {'wave': ev[1], 'foods': [ftype for pos, ftype in ev[2]],
+                                                     'obstacles': ev[4], 'tiles': len(ev[3])}))
+            elif kind == 'reset':
+                rows.append((t, game, tick, 'start', {'grid': [engine.grid_w, engine.grid_h]}))
+            elif kind == 'death':
+                rows.append((t, game, tick, 'death', {'cause': ev[1], 'wave': engine.wave_number,
+                                                      'score': engine.score, 'length': len(engine.snake)}))
+        if rows:
+            with self._lock:
+                self._pending += rows
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5.0)
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # --- thread de escrita
+    def flush(self):
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return
+        data = ''.join(json.dumps(dict(fields, t=round(t, 3), game=game, tick=tick, ev=kind), separators=(',', ':'))
+                       + '\n' for t, game, tick, kind, fields in rows)
+        try:
+            if self._file is None or self._file.tell() >= self.max_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self.events_written += len(rows)
+        except Exception as e:
+            print('Falha ao gravar telemetria:', e)
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        os.makedirs(self.folder, exist_ok=True)
+        name = 'events_%s_%03d.jsonl' % (time.strftime('%Y%m%d_%H%M%S'), self.files_opened % 1000)
+        self._file = open(os.path.join(self.folder, name), 'a')
+        self.files_opened += 1
+        for old in log_files(self.folder)[:-self.max_files]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def _writer(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+def log_files(folder=TELEMETRY_DIR):
+    """Arquivos de log da pasta, do mais velho para o mais novo."""
+    return sorted(glob.glob(os.path.join(folder, 'events_*.jsonl')))
+
+
+def read_events(paths):
+    """Percorre as linhas de varios arquivos sem carregar nenhum inteiro; linhas quebradas sao puladas."""
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+# --- agregacao offline
+class TelemetryStats:
+    """
+    Acumula, num passe so pelos eventos: ate que leva cada partida chegou
+    (sobrevivencia por leva), causas de morte por leva e, por tipo de
+    comida, quantas apareceram e quantas foram comidas.
+    """
+
+    def __init__(self):
+        self.events = 0
+        self.games = 0
+        self.reached = Counter()          # leva maxima -> partidas que pararam nela
+        self.deaths = defaultdict(Counter)   # leva -> causa -> partidas
+        self.spawned = Counter()
+        self.eaten = Counter()
+        self.eaten_by_wave = defaultdict(Counter)
+        self.speed_changes = 0
+        self._open = {}   # game -> [leva atual, jogou?] (partidas sem death ainda)
+
+    def add(self, ev):
+        self.events += 1
+        kind = ev.get('ev')
+        game = ev.get('game')
+        if kind == 'start':
+            # o jogo roda uma partida por vez: as outras abertas foram abandonadas
+            for other in [g for g in self._open if g != game]:
+                self._close(other)
+            self._open.setdefault(game, [1, False])
+        elif kind == 'wave':
+            # a leva 1 vem antes do start da partida
+            state = self._open.setdefault(game, [1, False])
+            state[0] = max(state[0], ev['wave'])
+            self.spawned.update(ev['foods'])
+        elif kind == 'eat':
+            self.eaten[ev['food']] += 1
+            self.eaten_by_wave[ev['wave']][ev['food']] += 1
+            if game in self._open:
+                self._open[game][1] = True
+        elif kind == 'speed':
+            self.speed_changes += 1
+        elif kind == 'death':
+            self._open.pop(game, None)
+            self.games += 1
+            self.reached[ev['wave']] += 1
+            self.deaths[ev['wave']][ev['cause']] += 1
+
+    def _close(self, game):
+        # partida abandonada (reiniciada ou fechada sem morrer): conta ate onde chegou, sem causa;
+        # partidas que ficaram so no menu (nada comido) nao contam
+        wave, played = self._open.pop(game)
+        if played:
+            self.games += 1
+            self.reached[wave] += 1
+
+    def finish(self):
+        for game in list(self._open):
+            self._close(game)
+        return self
+
+    def survival(self):
+        """[(leva, partidas que chegaram nela, fracao, mortes nela)] em ordem de leva."""
+        if not self.reached:
+            return []
+        alive = self.games
+        rows = []
+        for wave in range(1, max(self.reached) + 1):
+            died = sum(self.deaths[wave].values())
+            rows.append((wave, alive, alive / self.games, died))
+            alive -= self.reached[wave]
+        return rows
+
+    def summary_lines(self, max_waves=30):
+        lines = ['%d eventos, %d partidas' % (self.events, self.games)]
+        lines.append('comida    apareceu    comida   taxa')
+        for ftype in sorted(self.spawned | self.eaten):
+            spawned, eaten = self.spawned[ftype], self.eaten[ftype]
+            lines.append('%-8s %9d %9d %5.1f%%' % (ftype, spawned, eaten, 100.0 * eaten / spawned if spawned else 0.0))
+        lines.append('leva  chegaram  fracao  mortes  causas   (so levas com mortes)')
+        rows = [r for r in self.survival() if r[3]]
+        for wave, alive, frac, died in rows[:max_waves]:
+            causes = ' '.join('%s=%d' % kv for kv in self.deaths[wave].most_common())
+            lines.append('%4d %9d %6.1f%% %7d  %s' % (wave, alive, 100 * frac, died, causes))
+        return lines
+
+
+def aggregate(paths):
+    stats = TelemetryStats()
+    for ev in read_events(paths):
+        stats.add(ev)
+    return stats.finish()
+
+
+if __name__ == '__main__':
+    # python snake_telemetry.py [pasta ou arquivos .jsonl]
+    args = sys.argv[1:] or [TELEMETRY_DIR]
+    paths = []
+    for arg in args:
+        paths += log_files(arg) if os.path.isdir(arg) else [arg]
+    t0 = time.perf_counter()
+    stats = aggregate(paths)
+    for line in stats.summary_lines():
+        print(line)
+    print('%d arquivos em %.2fs' % (len(paths), time.perf_counter() - t0))
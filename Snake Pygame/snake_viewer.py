@@ -0,0 +1,90 @@
+import socket
+import sys
+import time
+
+import pygame
+
+from snake_protocol import SUBSCRIBE, KEYFRAME_REQUEST
+from snake_spectate import BoardMirror, SPECTATOR_PORT, SUBSCRIBER_TIMEOUT
+
+# --- CONFIG
+TILE = 12
+HUD_H = 28
+FPS = 30
+RESUBSCRIBE_INTERVAL = SUBSCRIBER_TIMEOUT / 3
+
+DISPLAY_GREEN = (110, 236, 0)
+BLACK = (0, 0, 0)
+FOOD_COLORS = {
+    'red': (200, 20, 20),
+    'blue': (20, 60, 200),
+    'purple': (150, 40, 180),
+    'orange': (230, 120, 20),
+}
+
+
+def main(host='127.0.0.1', port=SPECTATOR_PORT, session=None):
+    """Espectador: se inscreve no jogo (ou numa sessao do snake_server) e desenha o espelho do tabuleiro."""
+    server = (host, port)
+    hello = SUBSCRIBE if session is None else SUBSCRIBE + b' %d' % session
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    mirror = BoardMirror()
+
+    pygame.init()
+    screen = pygame.display.set_mode((640, 360))
+    pygame.display.set_caption('Snake - espectador')
+    font = pygame.font.SysFont('dejavusansmono', 16)
+    clock = pygame.time.Clock()
+    size = None
+    last_hello = 0.0
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                sock.close()
+                pygame.quit()
+                return
+
+        now = time.perf_counter()
+        try:
+            if now - last_hello >= RESUBSCRIBE_INTERVAL:
+                sock.sendto(hello, server)
+                last_hello = now
+            while True:
+                data = sock.recv(65536)
+                if mirror.apply(data):
+                    sock.sendto(KEYFRAME_REQUEST, server)
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            # servidor ainda fechado (ICMP port unreachable no Windows)
+            pass
+
+        if mirror.synced and size != (mirror.grid_w, mirror.grid_h):
+            size = (mirror.grid_w, mirror.grid_h)
+            screen = pygame.display.set_mode((size[0] * TILE, size[1] * TILE + HUD_H))
+
+        screen.fill(DISPLAY_GREEN)
+        if mirror.synced:
+            for x, y in mirror.obstacles:
+                pygame.draw.rect(screen, BLACK, (x * TILE, HUD_H + y * TILE, TILE, TILE))
+            for (x, y), ftype in mirror.foods.items():
+                pygame.draw.rect(screen, FOOD_COLORS[ftype], (x * TILE + 1, HUD_H + y * TILE + 1, TILE - 2, TILE - 2))
+            for x, y in mirror.snake:
+                pygame.draw.rect(screen, BLACK, (x * TILE + 1, HUD_H + y * TILE + 1, TILE - 2, TILE - 2))
+            hud = 'SCORE %d  WAVE %d  FOME %ds  %s' % (mirror.score, mirror.wave_number,
+                                                      mirror.hunger_left, mirror.state.upper())
+        else:
+            hud = 'aguardando %s:%d ...' % server
+        pygame.draw.line(screen, BLACK, (0, HUD_H - 2), (screen.get_width(), HUD_H - 2), 2)
+        screen.blit(font.render(hud, True, BLACK), (6, 5))
+        pygame.display.flip()
+        clock.tick(FPS)
+
+
+if __name__ == '__main__':
+    # python snake_viewer.py [host] [porta] [sessao]
+    args = sys.argv[1:]
+    main(args[0] if args else '127.0.0.1', int(args[1]) if len(args) > 1 else SPECTATOR_PORT,
+         int(args[2]) if len(args) > 2 else None)
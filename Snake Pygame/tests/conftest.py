@@ -0,0 +1,5 @@
+import os
+import sys
+
+# os modulos do jogo ficam soltos na pasta de cima (sem pacote)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
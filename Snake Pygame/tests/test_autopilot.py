@@ -0,0 +1,52 @@
+from collections import deque
+
+from snake_autopilot import Autopilot, UNREACHABLE, play_games
+from snake_engine import SnakeEngine, CELL_OBSTACLE
+
+
+def _reference_field(engine, pos):
+    w, h = engine.grid_w, engine.grid_h
+    dist = [UNREACHABLE] * (w * h)
+    dist[pos[1] * w + pos[0]] = 0
+    queue = deque([pos])
+    while queue:
+        x, y = queue.popleft()
+        d = dist[y * w + x] + 1
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            nx, ny = (x + dx) % w, (y + dy) % h
+            idx = ny * w + nx
+            if dist[idx] == UNREACHABLE and engine.grid[idx] != CELL_OBSTACLE:
+                dist[idx] = d
+                queue.append((nx, ny))
+    return dist
+
+
+def test_plays_past_obstacle_threshold():
+    engine = SnakeEngine(seed=3)
+    bot = Autopilot(engine)
+    checked = 0
+    layout = None
+    for _ in range(3):
+        engine.start_new_game()
+        bot.path.clear()
+        while engine.state == 'playing' and engine.tick_count < 3000:
+            bot.tick()
+            if engine.obstacles and engine.foods and engine.obstacles is not layout:
+                # campo com obstaculos confere com um BFS simples
+                layout = engine.obstacles
+                pos = engine.foods[0]['pos']
+                assert bot._field(pos) == _reference_field(engine, pos)
+                checked += 1
+    assert checked > 0
+
+
+def test_play_games_is_deterministic():
+    a = play_games(3, seed=5, max_ticks=2000)
+    b = play_games(3, seed=5, max_ticks=2000)
+    assert a == b
+    assert len(a) == 3
+    for score, wave, length, cause, ticks in a:
+        assert cause in ('body', 'hunger', 'obstacle', 'orange', 'board_full', 'limit')
+        assert ticks <= 2000
+    # o bot passa da leva em que surgem os obstaculos
+    assert max(r[1] for r in a) > 3
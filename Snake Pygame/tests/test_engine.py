@@ -0,0 +1,94 @@
+import random
+
+from snake_engine import (SnakeEngine, CELL_EMPTY, CELL_BODY, CELL_OBSTACLE, CELL_FOOD, FOOD_TYPES,
+                          CAUSE_BODY)
+
+
+def _check_board(engine):
+    """grid, free_cells/free_index, cobra, comidas e obstaculos contam a mesma historia."""
+    w = engine.grid_w
+    expected = bytearray(w * engine.grid_h)
+    for x, y in engine.snake:
+        expected[y * w + x] = CELL_BODY
+    for f in engine.foods:
+        x, y = f['pos']
+        expected[y * w + x] = CELL_FOOD + FOOD_TYPES.index(f['type'])
+    for obs in engine.obstacles:
+        for x, y in obs:
+            expected[y * w + x] = CELL_OBSTACLE
+    assert engine.grid == expected
+    assert len(set(engine.snake)) == len(engine.snake)
+    free = [i for i, code in enumerate(engine.grid) if code == CELL_EMPTY]
+    assert sorted(engine.free_cells) == free
+    for i, idx in enumerate(engine.free_cells):
+        assert engine.free_index[idx] == i
+
+
+def _clear_foods(engine):
+    for f in engine.foods:
+        engine._set_cell(f['pos'], CELL_EMPTY)
+    engine.foods = []
+
+
+def test_tick_moves_head_and_wraps():
+    engine = SnakeEngine(8, 6, seed=1)
+    engine.start_new_game(seed=1)
+    engine.hunger_limit = float('inf')
+    _clear_foods(engine)
+    hx, hy = engine.snake[0]
+    for i in range(1, 9):
+        engine.tick()
+        assert engine.state == 'playing'
+        assert engine.snake[0] == ((hx + i) % 8, hy)
+        assert len(engine.snake) == 3
+        assert engine.tick_count == i
+    _check_board(engine)
+
+
+def test_board_invariants_over_random_games():
+    rnd = random.Random(0)
+    engine = SnakeEngine(seed=0)
+    for _ in range(20):
+        engine.start_new_game()
+        _check_board(engine)
+        while engine.state == 'playing':
+            if rnd.random() < 0.3:
+                engine.process_input_cmd('test', rnd.choice(['UP', 'DOWN', 'LEFT', 'RIGHT']))
+            engine.tick()
+            if engine.tick_count % 7 == 0:
+                _check_board(engine)
+        _check_board(engine)
+
+
+def test_collision_with_body_ends_game():
+    engine = SnakeEngine(seed=2)
+    engine.start_new_game(seed=2)
+    # cobra de 5 indo para a direita: uma volta em U bate no corpo
+    x, y = engine.snake[0]
+    for i in range(1, 3):
+        engine._set_cell((x - 2 - i, y), CELL_BODY)
+        engine.snake.append((x - 2 - i, y))
+    _clear_foods(engine)
+    for cmd in ('UP', 'LEFT', 'DOWN'):
+        engine.process_input_cmd('test', cmd)
+    for _ in range(3):
+        engine.tick()
+    assert engine.state == 'gameover'
+    assert engine.death_cause == CAUSE_BODY
+
+
+def test_turn_queue():
+    engine = SnakeEngine(seed=3)
+    engine.start_new_game(seed=3)
+    assert engine.direction == (1, 0)
+    engine.try_set_direction((-1, 0))    # 180 graus
+    engine.try_set_direction((0, -1))
+    engine.try_set_direction((0, -1))    # repetido
+    engine.try_set_direction((0, 1))     # 180 graus do giro anterior
+    engine.try_set_direction((-1, 0))
+    assert engine.pending_turns() == 2
+    engine.tick()
+    assert engine.direction == (0, -1)
+    engine.tick()
+    assert engine.direction == (-1, 0)
+    assert engine.pending_turns() == 0
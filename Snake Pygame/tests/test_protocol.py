@@ -0,0 +1,45 @@
+from snake_protocol import SerialFrameParser, decode_control, encode_control, MAX_SERIAL_LINE
+
+
+def test_control_round_trip():
+    data = encode_control(0x1234, ['UP', 'LEFT', 'ENTER'], reset=True)
+    flags, seq, cmds = decode_control(data)
+    assert seq == 0x1234 and flags & 1
+    assert cmds == ['UP', 'LEFT', 'ENTER']
+
+
+def test_frames_split_at_every_byte():
+    stream = b'UP\r\n' + encode_control(10, ['LEFT', 'DOWN']) + b'pause\n' + encode_control(11, ['RIGHT'])
+    parser = SerialFrameParser()
+    cmds = []
+    for i in range(len(stream)):
+        cmds += parser.feed(stream[i:i + 1])
+    assert cmds == ['UP', 'LEFT', 'DOWN', 'PAUSE', 'RIGHT']
+    assert parser.malformed == 0 and parser.frames == 4
+
+
+def test_mixed_frames_in_one_read():
+    parser = SerialFrameParser()
+    stream = encode_control(1, ['UP']) + b'DOWN\n' + encode_control(2, ['ESC']) + b'LEFT\n'
+    assert parser.feed(stream) == ['UP', 'DOWN', 'ESC', 'LEFT']
+
+
+def test_stray_magic_does_not_hold_back_text():
+    parser = SerialFrameParser()
+    assert parser.feed(b'\xa5') == []
+    assert parser.feed(b'UP\n') == ['UP']
+    assert parser.feed(b'LEFT\n') == ['LEFT']
+    assert parser.malformed == 1
+
+
+def test_truncated_packet_resyncs_on_newline():
+    parser = SerialFrameParser()
+    cut = encode_control(3, ['UP', 'DOWN', 'LEFT', 'RIGHT'])[:8]
+    assert parser.feed(cut + b'\nDOWN\n') == ['DOWN']
+    assert parser.malformed == 1
+
+
+def test_garbage_and_long_lines_are_malformed():
+    parser = SerialFrameParser()
+    assert parser.feed(b'\x01\x02\n' + b'x' * (MAX_SERIAL_LINE + 10) + b'\nUP\n') == ['UP']
+    assert parser.malformed == 2
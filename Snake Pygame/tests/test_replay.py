@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from snake_engine import SnakeEngine
+from snake_replay import (HEADER, REPLAY_VERSION, ReplayError, ReplayRecorder, decode_replay, encode_replay,
+                          play_replay)
+
+
+def _record(n_games, seed, rules=None, menu=False):
+    """Partidas com rajadas de comandos (varios por tick); retorna os replays."""
+    bot = random.Random(seed)
+    engine = SnakeEngine(seed=seed, rules=rules)
+    engine.recorder = ReplayRecorder()
+    replays = []
+    for _ in range(n_games):
+        engine.start_new_game(initial_menu=menu)
+        if menu:
+            engine.process_input_cmd('test', bot.choice(['UP', 'DOWN']))
+            engine.process_input_cmd('test', 'ENTER')
+        while engine.state == 'playing':
+            for _ in range(bot.randrange(3)):
+                engine.process_input_cmd('test', bot.choice(['UP', 'DOWN', 'LEFT', 'RIGHT']))
+            engine.tick()
+        replays.append(engine.recorder.last_replay)
+    return replays
+
+
+def test_encode_decode_round_trip():
+    records = [(0, 1), (3, 4), (3, 2), (1000, 5)]
+    data = encode_replay(123456789, 56, 24, records, 2000, b'12345678')
+    rep = decode_replay(data)
+    assert rep['version'] == REPLAY_VERSION
+    assert (rep['seed'], rep['grid_w'], rep['grid_h']) == (123456789, 56, 24)
+    assert rep['records'] == records
+    assert (rep['final_tick'], rep['final_hash']) == (2000, b'12345678')
+
+
+def test_recorded_games_verify():
+    for data in _record(30, seed=1):
+        assert play_replay(data)[1]
+
+
+def test_menu_turns_are_recorded():
+    for data in _record(30, seed=2, menu=True):
+        assert play_replay(data)[1]
+
+
+def test_v1_replays_play_without_turn_queue():
+    # v1 era gravado antes da fila de giros: o ultimo comando antes do step vencia
+    for data in _record(30, seed=3, rules={'turn_buffer': 0}):
+        v1 = bytearray(data)
+        v1[4] = 1   # byte da versao, logo depois do magic
+        assert decode_replay(bytes(v1))['version'] == 1
+        assert play_replay(bytes(v1))[1]
+
+
+def test_unknown_version_and_bad_magic():
+    data = bytearray(_record(1, seed=4)[0])
+    data[4] = 99
+    with pytest.raises(ReplayError):
+        decode_replay(bytes(data))
+    with pytest.raises(ReplayError):
+        decode_replay(b'XXXX' + bytes(HEADER.size))
@@ -0,0 +1,49 @@
+import random
+
+from snake_engine import SnakeEngine
+from snake_spectate import BoardMirror, StreamPublisher, board_of
+
+
+def test_mirror_follows_engine():
+    rnd = random.Random(0)
+    engine = SnakeEngine(seed=0)
+    engine.events = []
+    publisher = StreamPublisher(keyframe_interval=1e9)
+    mirror = BoardMirror()
+    now = 0.0
+    for _ in range(5):
+        engine.start_new_game()
+        while engine.state == 'playing':
+            if rnd.random() < 0.3:
+                engine.process_input_cmd('test', rnd.choice(['UP', 'DOWN', 'LEFT', 'RIGHT']))
+            engine.tick()
+            now += 0.1
+            data = publisher.packet(engine, engine.events, now)
+            engine.events.clear()
+            if data is not None:
+                assert not mirror.apply(data)
+            assert mirror.synced
+            snake, foods, obstacles = board_of(engine)
+            assert list(mirror.snake) == snake
+            assert mirror.foods == foods
+            assert mirror.obstacles == obstacles
+            assert (mirror.score, mirror.wave_number) == (engine.score, engine.wave_number)
+    # so o primeiro quadro de cada partida precisa ser keyframe
+    assert publisher.keyframes_sent == 5
+    assert publisher.deltas_sent > 0
+
+
+def test_gap_asks_for_keyframe():
+    engine = SnakeEngine(seed=1)
+    engine.events = []
+    publisher = StreamPublisher(keyframe_interval=1e9)
+    mirror = BoardMirror()
+    engine.start_new_game()
+    mirror.apply(publisher.packet(engine, engine.events, 0.0))
+    engine.events.clear()
+    engine.tick()
+    publisher.packet(engine, engine.events, 0.1)   # perdido
+    engine.events.clear()
+    engine.tick()
+    assert mirror.apply(publisher.packet(engine, engine.events, 0.2))
+    assert not mirror.synced